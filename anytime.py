@@ -0,0 +1,259 @@
+"""
+Anytime search support for Wood Block Puzzle solver.
+
+This module contains the common interface shared by the solvers:
+- Budget: node, time and memory limits with an amortized clock check,
+  progress reporting and tracking of the best state seen so far
+- CancelToken: cooperative cancellation from another thread or process
+- SearchResult / solve(): run any budget-aware solver and get either its
+  solution or, when the budget runs out, the best partial plan it reached
+"""
+
+import os
+import threading
+import time
+from cst import *
+
+CHECK_EVERY = 256  # Expansions between clock / memory / cancellation checks
+
+try:
+    _PAGE_SIZE = os.sysconf("SC_PAGE_SIZE")
+except (AttributeError, ValueError, OSError):
+    _PAGE_SIZE = None  # No sysconf (e.g. Windows): memory budgets are ignored
+
+
+def _rss_bytes(pid="self"):
+    """
+    Resident memory of a process.
+
+    Args:
+        pid: Process id (default: this process)
+
+    Returns:
+        int: Bytes in use, None where it can't be measured (or the process
+        has exited)
+    """
+    if _PAGE_SIZE is None:
+        return None
+    try:
+        with open(f"/proc/{pid}/statm") as statm:
+            return int(statm.read().split()[1]) * _PAGE_SIZE
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+class CancelToken:
+    """
+    Flag used to ask a running search to stop early.
+
+    Wraps an Event, so a token made from a multiprocessing Event can also be
+    passed to searches running in other processes.
+    """
+
+    def __init__(self, event=None):
+        """
+        Args:
+            event: threading/multiprocessing Event to use (default: a new
+                threading.Event)
+        """
+        self._event = event if event is not None else threading.Event()
+
+    def cancel(self):
+        """Request cancellation."""
+        self._event.set()
+
+    @property
+    def cancelled(self):
+        """True once cancel() was called."""
+        return self._event.is_set()
+
+
+class Budget:
+    """
+    Resource limits and bookkeeping for one search run.
+
+    Solvers call tick() once per expanded state. Node limits are checked on
+    every tick; the clock, memory, cancellation token and progress callback
+    only every `check_every` ticks, so the check costs almost nothing per
+    node.
+
+    Attributes:
+        seconds (float): Wall-clock limit (None = unlimited)
+        nodes (int): Expansion limit (None = unlimited)
+        memory (int): Limit on memory growth in bytes since start(), of
+            this process plus any worker processes passed to watch()
+            (None = unlimited; ignored where RSS can't be read)
+        progress (function): Called as progress(expansions, frontier,
+            best_h, elapsed) at every check
+        cancel (CancelToken): Token checked for cancellation
+        expansions (int): States expanded so far
+        best (State): Lowest-h state expanded so far (the partial plan)
+        best_h (int): Its heuristic value
+        reason (str): Why the search stopped early ("nodes", "time",
+            "memory" or "cancelled"), None if it wasn't stopped
+    """
+
+    def __init__(self, seconds=SEARCH_SECONDS, nodes=None, memory=None, progress=None,
+                 cancel=None, check_every=CHECK_EVERY):
+        """
+        Args:
+            seconds (float): Wall-clock limit (default SEARCH_SECONDS)
+            nodes (int): Expansion limit
+            memory (int): Memory growth limit in bytes
+            progress (function): Progress callback
+            cancel (CancelToken): Cancellation token
+            check_every (int): Ticks between amortized checks
+        """
+        self.seconds = seconds
+        self.nodes = nodes
+        self.memory = memory
+        self.progress = progress
+        self.cancel = cancel
+        self.check_every = check_every
+        self.start()
+
+    def start(self):
+        """
+        Reset the counters and start the clock (called by every solver).
+
+        Returns:
+            Budget: self
+        """
+        self.start_time = time.time()
+        self._base_memory = _rss_bytes() if self.memory is not None else None
+        self._workers = {}  # Watched pid -> RSS when watching started
+        self._next_check = self.check_every
+        self.expansions = 0
+        self.best = None
+        self.best_h = None
+        self.reason = None
+        return self
+
+    def watch(self, pids):
+        """
+        Count the memory growth of worker processes toward the limit.
+
+        Multi-process solvers keep their frontier and visited sets in the
+        workers, so they call this right after starting them.
+
+        Args:
+            pids (iterable[int]): Worker process ids
+        """
+        if self._base_memory is None:
+            return
+        for pid in pids:
+            self._workers[pid] = _rss_bytes(pid) or 0
+
+    def _memory_growth(self):
+        """Bytes grown since start() by this process and watched workers."""
+        rss = _rss_bytes()
+        if rss is None:
+            return None
+        growth = rss - self._base_memory
+        for pid, base in self._workers.items():
+            worker = _rss_bytes(pid)
+            if worker is not None:
+                growth += max(0, worker - base)
+        return growth
+
+    @property
+    def elapsed(self):
+        """Seconds since start()."""
+        return time.time() - self.start_time
+
+    def tick(self, state, h, frontier):
+        """
+        Record one expansion.
+
+        Args:
+            state (State): Expanded state (None to skip best-state tracking,
+                e.g. detached states without a parent chain)
+            h (int): Its heuristic value (lower is closer to the goal)
+            frontier (int): Current frontier size
+
+        Returns:
+            bool: True if the search must stop (see `reason`)
+        """
+        self.expansions += 1
+        if state is not None and (self.best_h is None or h < self.best_h):
+            self.best, self.best_h = state, h
+        if self.nodes is not None and self.expansions >= self.nodes:
+            self.reason = "nodes"
+            return True
+        if self.expansions >= self._next_check:
+            self._next_check = self.expansions + self.check_every
+            return self.check(frontier)
+        return False
+
+    def check(self, frontier):
+        """
+        Check clock, memory and cancellation now and report progress.
+
+        Used directly by solvers without a per-node loop in this process.
+
+        Args:
+            frontier (int): Current frontier size
+
+        Returns:
+            bool: True if the search must stop (see `reason`)
+        """
+        elapsed = self.elapsed
+        if self.progress is not None:
+            self.progress(self.expansions, frontier, self.best_h, elapsed)
+        if self.cancel is not None and self.cancel.cancelled:
+            self.reason = "cancelled"
+        elif self.seconds is not None and elapsed > self.seconds:
+            self.reason = "time"
+        elif self._base_memory is not None and (growth := self._memory_growth()) is not None \
+                and growth > self.memory:
+            self.reason = "memory"
+        return self.reason is not None
+
+
+class SearchResult:
+    """
+    Outcome of solve().
+
+    Attributes:
+        solution (State): Goal state, None if none was found
+        partial (State): Best state reached when no goal was found (lowest h
+            among expanded states), None otherwise
+        reason (str): Budget.reason ("nodes", "time", "memory",
+            "cancelled"), None if the search ran to completion
+        expansions (int): States expanded
+        elapsed (float): Seconds spent searching
+    """
+
+    def __init__(self, solution, partial, reason, expansions, elapsed):
+        self.solution = solution
+        self.partial = partial
+        self.reason = reason
+        self.expansions = expansions
+        self.elapsed = elapsed
+
+    @property
+    def plan(self):
+        """Final state of the best plan available (solution, else partial)."""
+        return self.solution if self.solution is not None else self.partial
+
+
+def solve(solver, initial_state, budget=None):
+    """
+    Run a budget-aware solver and collect its result.
+
+    Args:
+        solver (function): Called as solver(initial_state, budget) and
+            returning a goal State or None (e.g. a lambda around bfs())
+        initial_state (State): Starting puzzle configuration
+        budget (Budget): Limits for this run (default: Budget())
+
+    Returns:
+        SearchResult: Solution, or the best partial plan if it ran out of
+        budget before finding one
+    """
+    budget = budget if budget is not None else Budget()
+    solution = solver(initial_state, budget)
+    partial = None
+    if solution is None and budget.best is not None and budget.best is not initial_state:
+        partial = budget.best
+    return SearchResult(solution, partial, budget.reason, budget.expansions, budget.elapsed)
@@ -36,6 +36,24 @@ HEIGHT = 750                   # Screen height
 GRID_SIZE = 4                  # Default grid size for Level 1
 BLOCK_SIZE = 40                # Size of individual blocks (pixels)
 
+# Search Configuration
+BEAM_WIDTHS = [10, 50, 200]    # Beam search widths offered in the algorithm menu
+BEAM_WIDTH = 50                # Default beam width (also used for hints)
+SEARCH_SECONDS = 15            # Default time budget of a solver run
+PORTFOLIO_OPTIMALITY = "optimal"  # Portfolio waits for a member of this rank (parallel.OPTIMALITY)
+# Solvers returning shortest plans (the A* family on the pattern database)
+OPTIMAL_ALGORITHMS = ["bfs", "a_star", "ida_star", "hda_star", "parallel_bfs", "external_bfs"]
+HINT_SECONDS = 5               # Time budget of a hint (best partial plan after)
+HINT_CACHE_SIZE = 1024         # Positions whose hint is kept (least recently used evicted)
+HINT_MEMORY_SIZE = 100000      # States per table of a game's hint SearchMemory (LRU evicted)
+SOLUTION_CACHE_PATH = "solutions.db"  # Persistent plan store (sqlite), see solution_cache.py
+SOLUTION_CACHE_SIZE = 100000   # Positions kept in the plan store (least recently used evicted)
+TABLEBASE_DIR = "tablebases"   # Endgame tables written by tablebase.py
+TABLEBASE_MAX_CELLS = 16       # Largest board tabulated by default (table size is 2**cells)
+TABLEBASE_MAX_POSITIONS = 20000000  # Largest reachable set tabulated sparsely (larger boards)
+PDB_MAX_CELLS = 12             # Cells per pattern-database band (table size is 2**cells)
+HEURISTIC_CACHE_SIZE = 100000  # States whose heuristic value is memoized (least recently used evicted)
+
 # Menu Assets Dictionary
 MENU_ASSETS = {
     "main_bg": "assets/sem_menu.png",
@@ -52,6 +70,15 @@ PC_MODE_COLORS = {
 }
 
 # Level Configurations
+# Starting board of every level (1 = pre-filled cell) and its size
+LEVEL_CONFIG = {
+    1: {"size": 4, "grid": [[1, 0, 0, 0], [1, 0, 0, 0], [0, 1, 1, 0], [0, 0, 0, 0]]},
+    2: {"size": 5, "grid": [[1, 0, 0, 0, 0], [1, 0, 0, 1, 0], [1, 0, 0, 1, 0],
+                           [0, 0, 1, 1, 0], [0, 0, 1, 1, 0]]},
+    3: {"size": 6, "grid": [[1, 1, 0, 0, 0, 0], [1, 1, 0, 1, 1, 1], [0, 0, 0, 0, 0, 1],
+                           [0, 0, 0, 0, 1, 1], [0, 0, 0, 0, 1, 0], [0, 1, 0, 0, 0, 0]]}
+}
+
 # Dictionary mapping level numbers to their available block shapes and colors
 # Each block is defined by a 2D matrix (shape) and an RGB color tuple
 LEVEL_BLOCKS = {
@@ -0,0 +1,396 @@
+"""
+External-memory search for Wood Block Puzzle solver.
+
+This module contains a disk-backed Breadth-First Search for boards whose
+frontier and visited set don't fit in RAM. Every layer is stored as a file of
+fixed-size binary records sorted by state key; duplicates are removed with a
+streaming merge of sorted runs against the cumulative visited file, and files
+are read through memory maps, so RAM use is bounded by the run size.
+
+Record layout (RECORD_SIZE bytes, big-endian so byte order == key order):
+    key (8)         Zobrist key of the color-agnostic state
+    occupancy (16)  Board bitmask (boards up to 11x11)
+    count (1)       Number of blocks in the inventory
+    blocks (8)      LEVEL_BLOCKS indices of the inventory (0xFF = unused)
+    parent (8)      Key of the parent state in the previous layer
+    block (1)       Inventory index of the block placed to get here
+    placement (2)   Index of the placement in utils.get_placements()
+"""
+
+import heapq
+import mmap
+import os
+import shutil
+import struct
+import tempfile
+from cst import *
+from anytime import Budget
+from game import *
+
+RECORD = struct.Struct(">Q16sB8sQBH")
+RECORD_SIZE = RECORD.size
+RUN_RECORDS = 100000  # Candidate records sorted in memory before spilling a run
+MERGE_FAN_IN = 64     # Runs merged at once (each holds a file handle and a map)
+NO_BLOCK = 0xFF
+
+
+def _encode(state, level, parent_key=0, move_code=(NO_BLOCK, 0)):
+    """
+    Pack a color-agnostic state into a fixed-size record.
+
+    Args:
+        state (State): State to encode
+        level (int): Current game level (inventory stored as block indices)
+        parent_key (int): Key of the parent state (0 for the root)
+        move_code (tuple): (inventory index, placement index) of the last move
+
+    Returns:
+        bytes: RECORD_SIZE bytes
+    """
+    indices = [LEVEL_BLOCKS[level].index(block) for block in state.blocks]
+    blocks = bytes(indices + [NO_BLOCK] * (8 - len(indices)))
+    return RECORD.pack(state.key, state.occupancy.to_bytes(16, "big"), len(indices), blocks,
+                       parent_key, *move_code)
+
+
+def _decode(record, level, settings, depth):
+    """
+    Rebuild a detached state from a record.
+
+    Args:
+        record (bytes): Record produced by _encode()
+        level (int): Current game level
+        settings (tuple): (grid_size, tolerance)
+        depth (int): Layer of the record (becomes State.moves)
+
+    Returns:
+        tuple: (State, parent key, (inventory index, placement index))
+    """
+    key, occupancy, count, blocks, parent_key, block, placement = RECORD.unpack(record)
+    grid_size, tolerance = settings
+    inventory = intern_inventory([LEVEL_BLOCKS[level][i] for i in blocks[:count]])
+    state = State.from_parts(int.from_bytes(occupancy, "big"), inventory, grid_size,
+                             depth, key, tolerance, True)
+    return state, parent_key, (block, placement)
+
+
+def _coded_moves(state):
+    """
+    Enumerate legal moves with a compact code for each.
+
+    Args:
+        state (State): State to expand
+
+    Yields:
+        tuple: (move descriptor for State.apply, (inventory index, placement index))
+    """
+    for i, (block, _) in enumerate(state.blocks):
+        for p, (rotation, x, y, mask) in enumerate(get_placements(block, state.grid_size)):
+            if not state.occupancy & mask:
+                yield (i, rotation, x, y, mask), (i, p)
+
+
+class LayerFile:
+    """
+    Read-only, memory-mapped view of a file of sorted records.
+
+    Attributes:
+        path (str): File location
+        count (int): Number of records
+    """
+
+    def __init__(self, path):
+        """
+        Map a record file into memory.
+
+        Args:
+            path (str): File written by _write_records()
+        """
+        self.path = path
+        self.count = os.path.getsize(path) // RECORD_SIZE
+        self._file = open(path, "rb")
+        self._map = (mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+                     if self.count else b"")
+
+    def __iter__(self):
+        """Yield the records in key order."""
+        for offset in range(0, self.count * RECORD_SIZE, RECORD_SIZE):
+            yield self._map[offset:offset + RECORD_SIZE]
+
+    def find(self, key):
+        """
+        Binary search a record by key.
+
+        Args:
+            key (int): State key
+
+        Returns:
+            bytes: Matching record, None if absent
+        """
+        target = key.to_bytes(8, "big")
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            offset = middle * RECORD_SIZE
+            if self._map[offset:offset + 8] < target:
+                low = middle + 1
+            else:
+                high = middle
+        offset = low * RECORD_SIZE
+        if low < self.count and self._map[offset:offset + 8] == target:
+            return self._map[offset:offset + RECORD_SIZE]
+        return None
+
+    def close(self):
+        """Release the memory map and file handle."""
+        if self.count:
+            self._map.close()
+        self._file.close()
+
+
+def _write_records(path, records):
+    """
+    Stream records to a file.
+
+    Args:
+        path (str): Destination
+        records (iterable[bytes]): Records, already in key order
+
+    Returns:
+        int: Number of records written
+    """
+    count = 0
+    with open(path, "wb") as out:
+        for record in records:
+            out.write(record)
+            count += 1
+    return count
+
+
+def _unique(records):
+    """Drop consecutive records with the same key (input sorted by key)."""
+    last = None
+    for record in records:
+        if record[:8] != last:
+            last = record[:8]
+            yield record
+
+
+class _OutOfBudget(Exception):
+    """Raised by _checked() to abandon a streaming merge."""
+
+
+def _checked(records, budget, frontier):
+    """
+    Pass records through, checking the budget every `check_every` records.
+
+    Raises:
+        _OutOfBudget: If the budget runs out mid-stream
+    """
+    for count, record in enumerate(records, 1):
+        if not count % budget.check_every and budget.check(frontier):
+            raise _OutOfBudget
+        yield record
+
+
+def _merge_runs(workdir, depth, runs, fan_in, budget):
+    """
+    Merge sorted runs in passes until at most fan_in remain.
+
+    Args:
+        workdir (str): Directory of the run files
+        depth (int): Layer being built (names the merged runs)
+        runs (list[LayerFile]): Runs, replaced in place by the merged ones
+            (so the caller can always close whatever is still listed)
+        fan_in (int): Maximum runs open in one merge
+        budget (Budget): Checked while merging
+
+    Raises:
+        _OutOfBudget: If the budget runs out
+    """
+    merged = 0
+    while len(runs) > fan_in:
+        group = runs[:fan_in]
+        path = os.path.join(workdir, f"run{depth}_merged{merged}")
+        _write_records(path, _checked(_unique(heapq.merge(*group)), budget, len(runs)))
+        for run in group:
+            run.close()
+            os.remove(run.path)
+        del runs[:fan_in]
+        runs.append(LayerFile(path))
+        merged += 1
+
+
+def _new_only(candidates, visited):
+    """
+    Streaming anti-join: candidates whose key is not in visited.
+
+    Args:
+        candidates (iterable[bytes]): Unique records sorted by key
+        visited (iterable[bytes]): Unique records sorted by key
+
+    Yields:
+        bytes: Records of states not seen before
+    """
+    visited = iter(visited)
+    seen = next(visited, None)
+    for record in candidates:
+        while seen is not None and seen[:8] < record[:8]:
+            seen = next(visited, None)
+        if seen is None or seen[:8] != record[:8]:
+            yield record
+
+
+def external_bfs(initial_state, level, directory=None, run_records=RUN_RECORDS,
+                 fan_in=MERGE_FAN_IN, budget=None):
+    """
+    Disk-backed Breadth-First Search (external-memory BFS).
+
+    Args:
+        initial_state (State): Starting puzzle configuration
+        level (int): Current game level
+        directory (str): Where layer files are created (default: system temp)
+        run_records (int): Records sorted in memory before spilling a run
+        fan_in (int): Maximum runs merged at once (bounds open files)
+        budget (Budget): Search limits and progress reporting (no partial
+            plan: records are detached from their parents), also checked
+            while merging
+
+    Returns:
+        State: The solved state if found within budget (parent chain back
+        to initial_state), None otherwise
+
+    Notes:
+        - Guarantees shortest solutions like bfs() (goal test on generation)
+        - Layer d is expanded by streaming its file; children go to sorted
+          run files, which are merged, deduplicated and anti-joined against
+          the visited file to form layer d+1 and the new visited file
+        - RAM holds at most one run; everything else lives on disk
+        - Runs are merged in passes of at most fan_in files, so large layers
+          don't exhaust file descriptors
+        - States are keyed color-agnostically; the plan is replayed from
+          initial_state, so colors still follow the actual moves
+        - Files are deleted when the search ends
+    """
+    budget = (budget or Budget()).start()
+    if initial_state.is_goal():
+        return initial_state
+    root = State(initial_state.grid, initial_state.blocks, initial_state.grid_size,
+                 tolerance=initial_state.tolerance, color_agnostic=True)
+    settings = (root.grid_size, root.tolerance)
+    workdir = tempfile.mkdtemp(prefix="woodblock_bfs_", dir=directory)
+    layers = []
+    runs = []
+    visited = None
+    try:
+        _write_records(os.path.join(workdir, "layer0"), [_encode(root, level)])
+        shutil.copy(os.path.join(workdir, "layer0"), os.path.join(workdir, "visited0"))
+        layers.append(LayerFile(os.path.join(workdir, "layer0")))
+        visited = LayerFile(os.path.join(workdir, "visited0"))
+
+        depth = 0
+        while True:
+            # Expand the current layer into sorted runs of candidates
+            buffer = []
+            for record in layers[depth]:
+                if budget.tick(None, 0, layers[depth].count):
+                    return None
+                state, _, _ = _decode(record, level, settings, depth)
+                for move, code in _coded_moves(state):
+                    successor = state.apply(move, level)
+                    if successor.is_goal():
+                        codes = _trace_codes(layers, record, level, settings, depth) + [code]
+                        return _replay_codes(initial_state, codes, level)
+                    buffer.append(_encode(successor, level, state.key, code))
+                    if len(buffer) >= run_records:
+                        runs.append(_spill(workdir, depth, len(runs), buffer))
+                        buffer = []
+            if buffer:
+                runs.append(_spill(workdir, depth, len(runs), buffer))
+
+            # Merge runs, drop duplicates and previously visited states
+            depth += 1
+            _merge_runs(workdir, depth, runs, fan_in, budget)
+            layer_path = os.path.join(workdir, f"layer{depth}")
+            count = _write_records(layer_path, _checked(_new_only(
+                _unique(heapq.merge(*runs)), visited), budget, len(runs)))
+            for run in runs:
+                run.close()
+                os.remove(run.path)
+            runs.clear()
+            if not count:
+                return None  # Search space exhausted
+            layers.append(LayerFile(layer_path))
+
+            visited_path = os.path.join(workdir, f"visited{depth}")
+            _write_records(visited_path, _checked(heapq.merge(visited, layers[depth]), budget,
+                                                  layers[depth].count))
+            visited.close()
+            os.remove(visited.path)
+            visited = LayerFile(visited_path)
+    except _OutOfBudget:
+        return None
+    finally:
+        for run in runs:
+            run.close()
+        for layer in layers:
+            layer.close()
+        if visited:
+            visited.close()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def _spill(workdir, depth, index, buffer):
+    """
+    Sort a buffer of candidate records and write it as a run file.
+
+    Returns:
+        LayerFile: Memory-mapped run
+    """
+    buffer.sort()
+    path = os.path.join(workdir, f"run{depth}_{index}")
+    _write_records(path, buffer)
+    return LayerFile(path)
+
+
+def _trace_codes(layers, record, level, settings, depth):
+    """
+    Follow parent keys back through the layer files.
+
+    Args:
+        layers (list[LayerFile]): Layer files 0..depth
+        record (bytes): Record of the state at `depth`
+        level (int): Current game level
+        settings (tuple): (grid_size, tolerance)
+        depth (int): Layer of `record`
+
+    Returns:
+        list[tuple]: Move codes from the root to `record`'s state
+    """
+    codes = []
+    while depth > 0:
+        _, parent_key, code = _decode(record, level, settings, depth)
+        codes.append(code)
+        depth -= 1
+        record = layers[depth].find(parent_key)
+    codes.reverse()
+    return codes
+
+
+def _replay_codes(initial_state, codes, level):
+    """
+    Re-apply coded moves from the initial state.
+
+    Args:
+        initial_state (State): Root of the search
+        codes (list[tuple]): (inventory index, placement index) per move
+        level (int): Current game level
+
+    Returns:
+        State: Final state with a parent chain back to initial_state
+    """
+    state = initial_state
+    for i, p in codes:
+        block = state.blocks[i][0]
+        state = state.apply((i, *get_placements(block, state.grid_size)[p]), level)
+    return state
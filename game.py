@@ -30,64 +30,291 @@ def generate_block(level):
     return random.choice(LEVEL_BLOCKS[level])
 
 
+# Block inventories are interned: each distinct ordered inventory gets a small
+# int id shared by every state holding it, so nodes store one int instead of a
+# copied list of (block, color) tuples.
+_INVENTORIES = []        # inventory id -> tuple of (block, color)
+_INVENTORY_IDS = {}      # ((shape key, color), ...) -> inventory id
+_INVENTORY_SORTED = []   # inventory id -> (sorted (shape, color) keys, sorted shapes)
+_INVENTORY_KEYS = {}     # (inventory id, color_agnostic) -> Zobrist key
+_INVENTORY_AFTER = {}    # (inventory id, block index, level) -> inventory id
+
+
+def intern_inventory(blocks):
+    """
+    Return the shared id of a block inventory, registering it on first use.
+    
+    Args:
+        blocks (list[tuple]): Ordered (block_matrix, color) tuples
+        
+    Returns:
+        int: Inventory id (see State.inventory)
+    """
+    keys = tuple((block_key(block), color) for block, color in blocks)
+    if keys not in _INVENTORY_IDS:
+        _INVENTORY_IDS[keys] = len(_INVENTORIES)
+        _INVENTORIES.append(tuple(blocks))
+        _INVENTORY_SORTED.append((sorted(keys), sorted(shape for shape, _ in keys)))
+    return _INVENTORY_IDS[keys]
+
+
+def _inventory_key(inventory, color_agnostic):
+    """Cached Zobrist key of an interned inventory."""
+    if (inventory, color_agnostic) not in _INVENTORY_KEYS:
+        _INVENTORY_KEYS[inventory, color_agnostic] = inventory_key(
+            _INVENTORIES[inventory], color_agnostic)
+    return _INVENTORY_KEYS[inventory, color_agnostic]
+
+
+def _inventory_after(inventory, index, level):
+    """Cached inventory id after consuming block index (replenished when empty)."""
+    if (inventory, index, level) not in _INVENTORY_AFTER:
+        blocks = list(_INVENTORIES[inventory])
+        blocks.pop(index)
+        if not blocks:
+            blocks = LEVEL_BLOCKS[level].copy()
+        _INVENTORY_AFTER[inventory, index, level] = intern_inventory(blocks)
+    return _INVENTORY_AFTER[inventory, index, level]
+
+
 class State:
     """
-    Represents a complete game state including:
-    - Grid configuration
-    - Available blocks
-    - Move history
+    Compact search node for a game state:
+    - Board occupancy (bitmask)
+    - Available blocks (interned inventory id)
+    - Move count and a (parent, move) link
     - Search metadata
     
+    Nodes use __slots__ and hold no grid: the solver works on ``occupancy``, a
+    single int with bit ``y*N + x`` set for every filled cell. Cell colors are
+    only kept on the root (and on every node outside color-agnostic mode,
+    where they are part of the key); otherwise the ``grid`` property rebuilds
+    them by replaying the action chain, which is only needed to render the
+    final path.
+    
     Attributes:
-        grid (list[list[tuple]]): 2D array of RGB colors representing current board
-        blocks (list[tuple]): Available (block_matrix, color) tuples
+        occupancy (int): Bitmask of filled cells
+        inventory (int): Interned inventory id (see ``blocks``)
         grid_size (int): Dimensions of the game grid (N x N)
-        moves (int): Number of moves taken to reach this state
+        moves (int): Number of moves taken to reach this state (g)
         parent (State): Previous state in solution path
-        action (tuple): (block, color, x, y) of last placement
+        move (tuple): (block_index, rotation, x, y, mask) descriptor from
+            the parent's expand(), None on the root
+        key (int): 64-bit Zobrist key of board and block inventory
         tolerance (int): Allowed remaining colored cells for relaxed solutions
+        color_agnostic (bool): Solver mode keying states on occupancy and block
+            shapes only; colors are replayed from the action chain
+        colors (dict[int, tuple]): RGB color of every filled cell index, or
+            None on color-agnostic non-root nodes
     """
 
-    def __init__(self, grid, blocks, grid_size, moves=0, parent=None, action=None, tolerance=2):
+    __slots__ = ("occupancy", "inventory", "grid_size", "moves", "parent", "move",
+                 "key", "tolerance", "color_agnostic", "colors")
+
+    def __init__(self, grid, blocks, grid_size, moves=0, tolerance=2, color_agnostic=False):
         """
-        Initialize a new game state with deep copies of mutable data.
+        Initialize a root game state from a color grid.
         
         Args:
             grid: Current board state as 2D color array
             blocks: Available blocks for placement
             grid_size: Dimension of square grid
             moves: Move count (default 0)
-            parent: Previous state (default None)
-            action: Last move taken (default None)
             tolerance: Acceptable remaining cells (default 2)
+            color_agnostic: Ignore colors in hashing/equality (default False).
+                Colors never affect legality or line clears, so solvers can
+                enable this to merge boards that only differ in color.
         """
-        self.grid = [row.copy() for row in grid]  # Deep copy
-        self.blocks = blocks.copy()  # Deep copy
+        self.occupancy = grid_to_mask(grid, grid_size)
+        self.colors = {cell_index: grid[cell_index // grid_size][cell_index % grid_size]
+                       for cell_index in iter_bits(self.occupancy)}
+        self.inventory = intern_inventory(blocks)
         self.grid_size = grid_size
         self.moves = moves
-        self.parent = parent
-        self.action = action
+        self.parent = None
+        self.move = None
         self.tolerance = tolerance
+        self.color_agnostic = color_agnostic
+        self.key = board_key(self.colors, color_agnostic) ^ _inventory_key(self.inventory, color_agnostic)
+
+    @classmethod
+    def from_parts(cls, occupancy, inventory, grid_size, moves, key, tolerance=2,
+                   color_agnostic=False, colors=None, parent=None, move=None):
+        """
+        Assemble a node directly from its fields (no grid scan).
+        
+        Used by apply() and to rebuild nodes shipped between processes; a
+        node without parent must carry its colors for ``grid`` to work.
+        
+        Args:
+            occupancy: Bitmask of filled cells
+            inventory: Interned inventory id
+            grid_size, moves, tolerance, color_agnostic: As in __init__
+            key: Zobrist key consistent with the other fields
+            colors: {cell index: color} map or None (see class docstring)
+            parent: Previous state (default None)
+            move: Move descriptor that led here from parent (default None)
+            
+        Returns:
+            State: New node
+        """
+        state = cls.__new__(cls)
+        state.occupancy = occupancy
+        state.inventory = inventory
+        state.grid_size = grid_size
+        state.moves = moves
+        state.parent = parent
+        state.move = move
+        state.key = key
+        state.tolerance = tolerance
+        state.color_agnostic = color_agnostic
+        state.colors = colors
+        return state
+
+    @property
+    def blocks(self):
+        """
+        Available (block_matrix, color) tuples.
+        
+        Returns:
+            list[tuple]: Fresh list (safe to modify)
+        """
+        return list(_INVENTORIES[self.inventory])
+
+    @property
+    def action(self):
+        """
+        Last placement as (block, color, x, y), derived from the move link.
+        
+        Returns:
+            tuple: Placement of the last move, None on the root
+        """
+        if self.move is None:
+            return None
+        i, rotation, x, y, _ = self.move
+        return (rotation, _INVENTORIES[self.parent.inventory][i][1], x, y)
+
+    @property
+    def grid(self):
+        """
+        2D array of RGB colors for rendering.
+        
+        Replays the actions since the nearest node that stores colors
+        (the root in color-agnostic mode).
+        
+        Returns:
+            list[list[tuple]]: Fresh grid (safe to modify)
+        """
+        actions = []
+        state = self
+        while state.colors is None:
+            actions.append(state.action)
+            state = state.parent
+        grid = colors_to_grid(state.colors, self.grid_size)
+        for block, color, x, y in reversed(actions):
+            place_block(block, x, y, color, grid, self.grid_size)
+            clear_completed_lines(grid, self.grid_size)
+        return grid
+
+    def path(self):
+        """
+        Follow parent links back to the root.
+        
+        Returns:
+            list[State]: States from the root to this state
+        """
+        path = []
+        state = self
+        while state:
+            path.append(state)
+            state = state.parent
+        path.reverse()
+        return path
 
     def is_goal(self):
         """
         Check if state represents a solved puzzle.
         
         Returns:
-            bool: True if all grid cells are BLACK (empty)
+            bool: True if no cell is filled
             
         Note:
             Tolerance parameter isn't used here but may be used elsewhere
         """
-        return all(cell == BLACK for row in self.grid for cell in row)
+        return self.occupancy == 0
+
+    def expand(self, level):
+        """
+        Lazily enumerate the legal moves of this state.
+        
+        Yields lightweight move descriptors instead of child states, so a
+        search can stop early (e.g. at the first goal child) without building
+        the siblings. Pass a descriptor to apply() to materialize its child.
+        
+        Args:
+            level: Current game level (kept for symmetry with apply())
+            
+        Yields:
+            tuple: (block_index, rotation, x, y, mask) for each valid placement,
+            in the same order get_successors() returns children
+        """
+        for i, (block, _) in enumerate(_INVENTORIES[self.inventory]):
+            # Try every precomputed placement (rotation, anchor, cell mask)
+            for rotation, x, y, mask in get_placements(block, self.grid_size):
+                if not self.occupancy & mask:
+                    yield (i, rotation, x, y, mask)
+
+    def apply(self, move, level):
+        """
+        Materialize the successor state reached by a move from expand().
+        
+        Placement and line clearing are AND/OR operations on the occupancy
+        bitmask and the inventory transition is a cached id lookup, so a child
+        costs O(lines through the block + cells cleared) and stores only the
+        move itself.
+        
+        Args:
+            move: (block_index, rotation, x, y, mask) descriptor
+            level: Current game level for block replenishment
+            
+        Returns:
+            State: Child state with line clears and replenishment applied
+        """
+        i, _, _, _, mask = move
+        agnostic = self.color_agnostic
+        
+        # Place block and clear full lines on the bitboard. Children never
+        # hold full lines, so only the lines through the block can fill up;
+        # roots come from arbitrary grids and get a full scan.
+        occupancy, cleared, _ = clear_completed_lines_mask(
+            self.occupancy | mask, self.grid_size, None if self.parent is None else mask)
+        
+        # Consume the block (replenishing the inventory if it runs out)
+        inventory = _inventory_after(self.inventory, i, level)
+        key = self.key ^ _inventory_key(self.inventory, agnostic) ^ _inventory_key(inventory, agnostic)
+        
+        if agnostic:
+            # Colors only live on the root; the key only tracks occupancy
+            key ^= cells_key(mask, None) ^ cells_key(cleared, None)
+            colors = None
+        else:
+            color = _INVENTORIES[self.inventory][i][1]
+            key ^= cells_key(mask, color)
+            colors = self.colors.copy()
+            for cell_index in iter_bits(mask):
+                colors[cell_index] = color
+            for cell_index in iter_bits(cleared):
+                key ^= zobrist(("cell", cell_index, colors.pop(cell_index)))
+        
+        return State.from_parts(occupancy, inventory, self.grid_size, self.moves + 1, key,
+                                self.tolerance, agnostic, colors, self, move)
 
     def get_successors(self, level):
         """
         Generate all valid successor states by placing available blocks.
         
-        For each block, tries:
-        - All rotations
-        - All valid positions
+        For each block, tries every in-bounds placement (all rotations and
+        anchors) from the compiled placement index, then:
         - Handles line clearing
         - Manages block replenishment
         
@@ -98,60 +325,27 @@ class State:
             list[State]: Valid successor states
             
         Complexity:
-            O(b*r*p) where:
+            O(b*p) where:
             b = number of blocks
-            r = rotations per block (max 4)
-            p = possible positions (~grid_size^2)
-        """
-        successors = []
-        
-        for i, (block, color) in enumerate(self.blocks):
-            # Try all rotations
-            for rotation in get_rotations(block):
-                # Try all positions
-                for x in range(self.grid_size):
-                    for y in range(self.grid_size):
-                        if can_place_block(rotation, x, y, self.grid, self.grid_size):
-                            # Create new state with block placed
-                            new_grid = [row.copy() for row in self.grid]
-                            place_block(rotation, x, y, color, new_grid, self.grid_size)
-                            clear_completed_lines(new_grid, self.grid_size)
-                            
-                            # Update block inventory
-                            new_blocks = self.blocks.copy()
-                            new_blocks.pop(i)
-                            
-                            # Replenish if empty
-                            if not new_blocks:
-                                new_blocks = LEVEL_BLOCKS[level].copy()
-                            
-                            successors.append(
-                                State(
-                                    new_grid, 
-                                    new_blocks, 
-                                    self.grid_size,
-                                    self.moves + 1, 
-                                    self, 
-                                    (rotation, color, x, y),
-                                    self.tolerance
-                                )
-                            )
-        return successors
+            p = precomputed placements per block (all rotations)
+            
+        Note:
+            Eager wrapper around expand()/apply(); searches that may stop
+            early should iterate expand() instead
+        """
+        return [self.apply(move, level) for move in self.expand(level)]
 
     def __hash__(self):
         """
         Generate hash for state comparison and storage.
         
         Returns:
-            int: Hash based on immutable grid and sorted blocks
+            int: The incrementally maintained Zobrist key (O(1))
             
         Note:
-            Sorting blocks ensures order doesn't affect equality
+            XOR is order-independent, so block order doesn't affect the key
         """
-        grid_tuple = tuple(tuple(row) for row in self.grid)
-        blocks_tuple = tuple(sorted((tuple(map(tuple, b)), color) 
-                         for (b, color) in self.blocks))
-        return hash((grid_tuple, blocks_tuple))
+        return self.key
 
     def __eq__(self, other):
         """
@@ -161,24 +355,38 @@ class State:
             other: State to compare
             
         Returns:
-            bool: True if grids and blocksets match
+            bool: True if boards, colors and blocksets match (only
+            occupancy and block shapes in color-agnostic mode)
         """
         if not isinstance(other, State):
             return False
-        return (self.grid == other.grid and 
-                sorted(self.blocks) == sorted(other.blocks))
+        if self.occupancy != other.occupancy:
+            return False
+        if self.color_agnostic:
+            return _INVENTORY_SORTED[self.inventory][1] == _INVENTORY_SORTED[other.inventory][1]
+        return (self.colors == other.colors and
+                _INVENTORY_SORTED[self.inventory][0] == _INVENTORY_SORTED[other.inventory][0])
 
-    def __lt__(self, other):
-        """
-        Compare states for priority queue ordering.
+
+def replay_grids(path):
+    """
+    Rebuild the color grid of every state on a solution path.
+    
+    Only the first grid is reconstructed from the action chain; each later
+    grid applies one action to the previous one, so the whole path costs
+    O(len(path) * N^2) instead of replaying from the root for every state.
+    
+    Args:
+        path (list[State]): Consecutive states, e.g. from State.path()
         
-        Args:
-            other: State to compare
-            
-        Returns:
-            bool: True if this state has better heuristic value
-            
-        Note:
-            Used by A* and other informed search algorithms
-        """
-        return combined_heuristic(self.grid, self.blocks) < combined_heuristic(other.grid, other.blocks)
\ No newline at end of file
+    Returns:
+        list[list[list[tuple]]]: One grid per state
+    """
+    grids = [path[0].grid]
+    for state in path[1:]:
+        grid = [row.copy() for row in grids[-1]]
+        block, color, x, y = state.action
+        place_block(block, x, y, color, grid, state.grid_size)
+        clear_completed_lines(grid, state.grid_size)
+        grids.append(grid)
+    return grids
@@ -2,34 +2,38 @@
 Heuristic evaluation functions for Wood Block Puzzle solver.
 
 This module provides various heuristic functions to evaluate game states,
-used by search algorithms to estimate state quality without full exploration.
+used by search algorithms to estimate state quality without full exploration,
+and MemoizedHeuristic, which caches any of them for searches that re-score
+the same states (e.g. IDA*).
 """
 
+from collections import OrderedDict
 from cst import *
 from utils import *
 
-def heuristic_filled_cells(grid, blocks=None):
+def heuristic_filled_cells(state):
     """
     Counts the number of non-empty (filled) cells in the grid.
     
     This is the simplest possible heuristic - lower values indicate better states
     (closer to solution). Works well for greedy search but lacks strategic insight.
+    It is not admissible for move counts (one line clear empties up to 2N-1
+    cells in a single move), so A*/IDA* plans found with it aren't optimal.
 
     Args:
-        grid: 2D array of RGB tuples representing current board state
-        blocks: Ignored (present for interface consistency)
+        state: State whose occupancy bitmask is evaluated
 
     Returns:
-        int: Number of non-BLACK cells (0 is perfect score)
+        int: Number of filled cells (0 is perfect score)
 
     Example:
-        >>> grid = [[BLACK, WHITE], [WHITE, BLACK]]
-        >>> heuristic_filled_cells(grid)
+        >>> state = State([[BLACK, WHITE], [WHITE, BLACK]], [], 2)
+        >>> heuristic_filled_cells(state)
         2
     """
-    return sum(cell != BLACK for row in grid for cell in row)
+    return popcount(state.occupancy)
 
-def heuristic_remaining_blocks(grid, blocks):
+def heuristic_remaining_blocks(state):
     """
     Evaluates state based on number of unplaced blocks.
     
@@ -37,8 +41,7 @@ def heuristic_remaining_blocks(grid, blocks):
     However, this alone doesn't account for board configuration.
 
     Args:
-        grid: Ignored (present for interface consistency)
-        blocks: List of (block_matrix, color) tuples remaining
+        state: State whose remaining blocks are counted
 
     Returns:
         int: Count of remaining blocks (0 is perfect score)
@@ -46,9 +49,9 @@ def heuristic_remaining_blocks(grid, blocks):
     Note:
         Works best when combined with other heuristics
     """
-    return len(blocks)
+    return len(state.blocks)
 
-def combined_heuristic(grid, blocks):
+def combined_heuristic(state):
     """
     Comprehensive state evaluation combining multiple strategic factors.
     
@@ -60,8 +63,7 @@ def combined_heuristic(grid, blocks):
     Weights were determined empirically through testing.
 
     Args:
-        grid: Current board state
-        blocks: Remaining blocks
+        state: State to evaluate (occupancy bitmask and remaining blocks)
 
     Returns:
         int: Weighted heuristic score (lower is better)
@@ -70,24 +72,23 @@ def combined_heuristic(grid, blocks):
         The weights (10 for lines, 5 for blocks) can be tuned for
         different game levels or difficulty settings.
     """
-    grid_size = len(grid)
+    occupancy = state.occupancy
     
     # Filled cells (direct measure of progress)
-    filled = sum(cell != BLACK for row in grid for cell in row)
+    filled = popcount(occupancy)
     
-    # Potential line clears (strategic bonus)
-    lines = 0
-    lines += sum(all(cell != BLACK for cell in row) for row in grid)
-    lines += sum(all(grid[i][j] != BLACK for i in range(grid_size))
-                for j in range(grid_size))
+    # Potential line clears (strategic bonus); apply() clears full lines, so
+    # only roots (boards from arbitrary grids) can still hold any
+    lines = 0 if state.parent is not None else \
+        sum(occupancy & line == line for line in line_masks(state.grid_size))
     
     return (
         filled          # Base penalty
         - lines * 10    # Strong bonus for clearable lines
-        + len(blocks) * 5  # Moderate bonus for having options
+        + len(state.blocks) * 5  # Moderate bonus for having options
     )
 
-def heuristic_block_removal(grid, blocks):
+def heuristic_block_removal(state):
     """
     Estimates how many remaining blocks can potentially be placed.
     
@@ -95,29 +96,91 @@ def heuristic_block_removal(grid, blocks):
     are considered better, as they provide more solution paths.
 
     Args:
-        grid: Current board state
-        blocks: Remaining (block_matrix, color) tuples
+        state: State to evaluate (occupancy bitmask and remaining blocks)
 
     Returns:
         int: Negative count of placeable blocks (lower is better)
 
     Complexity:
-        O(b*r*p) where:
+        O(b*p) where:
         b = number of blocks
-        r = rotations per block (max 4)
-        p = grid positions (N^2)
+        p = precomputed placements per block (utils.get_placements)
     """
     removable_blocks = 0
-    grid_size = len(grid)
     
-    for block, _ in blocks:  # Color not needed for placement check
-        # Check all rotations
-        for rotation in get_rotations(block):
-            # Check all positions - using any() for early termination
-            if any(can_place_block(rotation, x, y, grid)
-                  for x in range(grid_size)
-                  for y in range(grid_size)):
-                removable_blocks += 1
-                break  # Found at least one placement
+    for block, _ in state.blocks:  # Color not needed for placement check
+        # Any free placement over all rotations - any() terminates early
+        if any(not state.occupancy & mask
+               for _, _, _, mask in get_placements(block, state.grid_size)):
+            removable_blocks += 1
             
-    return -removable_blocks  # Negative because fewer is better
\ No newline at end of file
+    return -removable_blocks  # Negative because fewer is better
+
+class MemoizedHeuristic:
+    """
+    Bounded LRU cache in front of a heuristic function.
+
+    The same board is reached through many move orders, and IDA* re-scores
+    every state on each iteration; a memoized heuristic computes each
+    (board, inventory) once. States are keyed by State.key, so with
+    color-agnostic solver states boards that only differ in color share an
+    entry. Use it like the wrapped function: `memo(state)`.
+
+    Instances pickle without their cache (worker processes start empty), so
+    they can be passed to the multi-process solvers of parallel.py.
+
+    Attributes:
+        heuristic (function): Wrapped heuristic (any picklable callable)
+        max_entries (int): Maximum cached states (least recently used evicted)
+        hits (int): Evaluations answered from the cache
+        misses (int): Evaluations computed by the heuristic
+    """
+
+    def __init__(self, heuristic, max_entries=HEURISTIC_CACHE_SIZE):
+        """
+        Args:
+            heuristic (function): Heuristic to memoize
+            max_entries (int): Maximum cached states
+        """
+        self.heuristic = heuristic
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._cache = OrderedDict()  # State.key -> heuristic value
+
+    def __getstate__(self):
+        return {"heuristic": self.heuristic, "max_entries": self.max_entries}
+
+    def __setstate__(self, state):
+        self.__init__(state["heuristic"], state["max_entries"])
+
+    def __call__(self, state):
+        """
+        Heuristic value of a state, computed on a cache miss.
+
+        Args:
+            state: State to evaluate
+
+        Returns:
+            int: Value returned by the wrapped heuristic
+        """
+        cache = self._cache
+        key = state.key
+        if key in cache:
+            self.hits += 1
+            cache.move_to_end(key)
+            return cache[key]
+        self.misses += 1
+        value = cache[key] = self.heuristic(state)
+        if len(cache) > self.max_entries:
+            cache.popitem(last=False)
+        return value
+
+    def __len__(self):
+        return len(self._cache)
+
+    @property
+    def hit_rate(self):
+        """Fraction of evaluations answered from the cache (0.0 before any)."""
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
@@ -0,0 +1,361 @@
+"""
+Hint generation for computer-assisted human mode.
+
+This module contains:
+- hint_search(): the solver used for hints (beam search under a Budget)
+- first_move(): the action a plan suggests from its root
+- SearchMemory: plans and dead ends found by earlier hint searches of a
+  game, reused by the later ones
+- HintWorker: runs hint searches in a background process so the game loop
+  keeps rendering at full frame rate while the computer is thinking, and
+  precomputes the hint of every new position while the player is idle
+
+Positions are sent to the worker as plain grids and block lists (State
+inventories are interned per process) and hints come back as
+(block, color, x, y) tuples.
+"""
+
+import multiprocessing
+import queue
+from collections import OrderedDict
+from cst import *
+from anytime import *
+from game import *
+from heuristics import *
+from search import beam_search
+from solution_cache import SolutionCache, encode_plan, replay_plan
+from tablebase import tablebase_search
+
+
+def hint_search(state, level, budget, memory=None):
+    """
+    Solver used for hints.
+
+    Args:
+        state (State): Current position (color-agnostic)
+        level (int): Current game level
+        budget (Budget): Search limits (HINT_SECONDS by default)
+        memory (SearchMemory): Plans and dead ends of earlier searches
+
+    Returns:
+        State: Goal state, None if the budget ran out first
+
+    Notes:
+        - Beam search bounds hint latency and memory per depth; when it runs
+          out of budget, solve() still returns the best partial plan
+    """
+    return beam_search(state, heuristic_filled_cells, level, BEAM_WIDTH, budget=budget,
+                       memory=memory)
+
+
+def first_move(plan):
+    """
+    Action of the first move of a plan.
+
+    Args:
+        plan (State): Final state of a plan (parent chain back to its root)
+
+    Returns:
+        tuple: (block, color, x, y) to draw as the hint, None for an empty plan
+    """
+    if plan is None or plan.parent is None:
+        return None
+    return plan.path()[1].action
+
+
+def position_key(occupancy, blocks):
+    """
+    Cache key of a hint position.
+
+    Args:
+        occupancy (int): Board bitmask (see utils.grid_to_mask)
+        blocks (list[tuple]): (block, color) inventory
+
+    Returns:
+        tuple: (occupancy, sorted (shape key, color) pairs); board colors
+        don't change hints, block colors do (the hint is drawn in them)
+    """
+    return (occupancy, tuple(sorted((block_key(block), color) for block, color in blocks)))
+
+
+class SearchMemory:
+    """
+    Transposition table kept by the hint process across the searches of a game.
+
+    Every hint search runs with the table of the searches before it
+    (beam_search(memory=...)), so the work already done for earlier
+    positions is reused rather than repeated:
+    - Plans: the remaining moves to the goal (a known distance) of every
+      state on a plan found so far; a search reaching any of them finishes
+      by replaying the stored moves
+    - Dead ends: states with no move left, or whose children are all dead
+      ends; they are never put on the beam again, and a dead root is
+      answered without searching
+
+    States are keyed by State.key (color-agnostic); both maps evict their
+    least recently used keys beyond `max_states`.
+
+    Attributes:
+        level (int): Current game level
+        max_states (int): Max keys per map
+        hits (int): Searches finished from a stored plan
+    """
+
+    def __init__(self, level, max_states=HINT_MEMORY_SIZE):
+        self.level = level
+        self.max_states = max_states
+        self.hits = 0
+        self._plans = OrderedDict()  # state key -> encoded moves to the goal
+        self._dead = OrderedDict()   # state key -> None
+
+    def __len__(self):
+        return len(self._plans) + len(self._dead)
+
+    def _touch(self, table, key, value):
+        table[key] = value
+        table.move_to_end(key)
+        if len(table) > self.max_states:
+            table.popitem(last=False)
+
+    def finish(self, state):
+        """
+        Complete a plan from a state already on a stored plan.
+
+        Args:
+            state (State): State reached by a search
+
+        Returns:
+            State: Goal state (parent chain through `state`), None if the
+            state is not on a stored plan
+        """
+        codes = self._plans.get(state.key)
+        if codes is None:
+            return None
+        goal = replay_plan(state, codes, self.level)
+        if goal is None or not goal.is_goal():
+            del self._plans[state.key]  # Key collision
+            return None
+        self._plans.move_to_end(state.key)
+        self.hits += 1
+        return goal
+
+    def is_dead(self, state):
+        """True if the state is known not to reach the goal."""
+        return state.key in self._dead
+
+    def mark_dead(self, state):
+        """Record a state that can't reach the goal."""
+        self._touch(self._dead, state.key, None)
+
+    def add(self, plan):
+        """
+        Store every suffix of a plan that reaches the goal.
+
+        Args:
+            plan (State): Goal state with a parent chain back to its root
+        """
+        path = plan.path()
+        codes = encode_plan(path, self.level)
+        for depth, state in enumerate(path[:-1]):
+            known = self._plans.get(state.key)
+            if known is None or len(known) > len(codes) - depth:
+                self._touch(self._plans, state.key, codes[depth:])
+
+
+class _Superseded:
+    """Event-like view of a generation counter: set once a newer request exists."""
+
+    def __init__(self, latest, generation):
+        self._latest = latest
+        self._generation = generation
+
+    def is_set(self):
+        return self._latest.value != self._generation
+
+
+def _hint_worker(requests, results, latest, level, seconds):
+    """
+    Hint process: answers requests until it receives None.
+
+    Args:
+        requests (Queue): (generation, grid, blocks, grid_size) positions
+        results (Queue): Receives (generation, hint) for every request
+        latest (Value): Generation of the newest request; searches for older
+            generations are cancelled through their Budget
+        level (int): Current game level
+        seconds (float): Time budget of each search
+
+    Notes:
+        - A SearchMemory carries plans and dead ends across requests:
+          positions on an earlier plan or known dead ends are answered
+          without searching, and every search reuses the table
+        - Boards with a tablebase are answered with its shortest plan
+        - Positions solved in earlier games come from the SolutionCache, and
+          new solutions are added to it
+    """
+    results.cancel_join_thread()
+    memory = SearchMemory(level)
+    cache = SolutionCache()
+    while (request := requests.get()) is not None:
+        generation, grid, blocks, grid_size = request
+        if latest.value != generation:
+            continue  # Superseded before it started
+        state = State(grid, blocks, grid_size, color_agnostic=True)
+        if memory.is_dead(state):
+            results.put((generation, None))
+            continue
+        if (goal := memory.finish(state)):
+            results.put((generation, first_move(goal)))  # On an earlier plan: no search
+            continue
+        if (goal := tablebase_search(state, level)):
+            memory.add(goal)
+            results.put((generation, first_move(goal)))
+            continue
+        if (cached := cache.lookup(state, level)):
+            memory.add(cached[0])
+            results.put((generation, first_move(cached[0])))
+            continue
+        token = CancelToken(_Superseded(latest, generation))
+        result = solve(lambda s, b: hint_search(s, level, b, memory), state,
+                       Budget(seconds, cancel=token))
+        if result.solution is not None:
+            memory.add(result.solution)
+            cache.store(result.solution, level, "hint")
+        if not token.cancelled:
+            results.put((generation, first_move(result.plan)))
+    cache.close()
+
+
+class HintWorker:
+    """
+    Owns the hint process of one assisted-mode game.
+
+    The game loop calls prefetch() whenever a new position appears,
+    request() when the player asks for a hint, poll() every frame, cancel()
+    whenever the board changes and close() on exit.
+
+    Every search gets a new generation number; results of older generations
+    are discarded, so a hint for a position the player already left is never
+    shown. Finished hints are cached by position_key(), so asking for a hint
+    the speculative search already found returns on the next frame.
+
+    Attributes:
+        level (int): Current game level
+        seconds (float): Time budget of each hint search
+        cache_size (int): Max cached positions (LRU eviction)
+    """
+
+    def __init__(self, level, seconds=HINT_SECONDS, cache_size=HINT_CACHE_SIZE):
+        """
+        Start the hint process.
+
+        Args:
+            level (int): Current game level
+            seconds (float): Time budget of each hint search
+            cache_size (int): Max cached positions
+        """
+        self.level = level
+        self.seconds = seconds
+        self.cache_size = cache_size
+        self._cache = OrderedDict()  # position key -> hint
+        self._current = None  # (generation, position key) of the running search
+        self._ready = None    # (hint,) answered from the cache, until polled
+        context = multiprocessing.get_context()
+        self._requests = context.Queue()
+        self._results = context.Queue()
+        self._latest = context.Value("q", 0, lock=False)
+        self._pending = None  # Generation being searched, None when idle
+        self._process = context.Process(target=_hint_worker, daemon=True,
+                                        args=(self._requests, self._results, self._latest,
+                                              level, seconds))
+        self._process.start()
+
+    @property
+    def thinking(self):
+        """True while the player waits for a hint still being searched."""
+        return self._pending is not None
+
+    def _search(self, grid, blocks, grid_size, key):
+        """Send a position to the hint process, superseding any running search."""
+        self._latest.value += 1
+        self._current = (self._latest.value, key)
+        self._requests.put((self._latest.value, grid, blocks, grid_size))
+        return self._latest.value
+
+    def prefetch(self, grid, blocks, grid_size):
+        """
+        Speculatively search the hint of a new position (no-op if cached).
+
+        Args:
+            grid (list[list]): Current board colors
+            blocks (list[tuple]): Current (block, color) inventory
+            grid_size (int): Board size
+        """
+        key = position_key(grid_to_mask(grid, grid_size), blocks)
+        if key not in self._cache and (self._current is None or self._current[1] != key):
+            self._search(grid, blocks, grid_size, key)
+
+    def request(self, grid, blocks, grid_size):
+        """
+        Ask for the hint of a position (answered by the next poll() if cached).
+
+        Args:
+            grid (list[list]): Current board colors
+            blocks (list[tuple]): Current (block, color) inventory
+            grid_size (int): Board size
+        """
+        key = position_key(grid_to_mask(grid, grid_size), blocks)
+        if key in self._cache:
+            self._cache.move_to_end(key)
+            self._ready = (self._cache[key],)
+        elif self._current is not None and self._current[1] == key:
+            self._pending = self._current[0]  # Speculative search already running
+        else:
+            self._pending = self._search(grid, blocks, grid_size, key)
+
+    def poll(self):
+        """
+        Take the finished hint, if any (never blocks).
+
+        Returns:
+            tuple: (ready, hint) where hint is (block, color, x, y), or None
+            if no move was found (or the hint process has died)
+        """
+        while True:
+            try:
+                generation, hint = self._results.get_nowait()
+            except queue.Empty:
+                break
+            if self._current is None or generation != self._current[0]:
+                continue  # Superseded search
+            self._cache[self._current[1]] = hint
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+            self._current = None
+            if generation == self._pending:
+                self._pending = None
+                return True, hint
+        if self._ready is not None:
+            (hint,), self._ready = self._ready, None
+            return True, hint
+        if self._pending is not None and not self._process.is_alive():
+            self._pending = self._current = None  # Hint process died: no hint
+            return True, None
+        return False, None
+
+    def cancel(self):
+        """Stop the running search and drop results for the old position."""
+        self._latest.value += 1
+        self._current = None
+        self._pending = None
+        self._ready = None
+
+    def close(self):
+        """Stop the hint process."""
+        self.cancel()
+        self._requests.put(None)
+        self._requests.cancel_join_thread()
+        self._process.join(timeout=1)
+        if self._process.is_alive():
+            self._process.terminate()
+            self._process.join()
@@ -3,7 +3,7 @@ Wood Block Puzzle Game
 
 A puzzle game where players place colored blocks on a grid to complete lines.
 Features multiple game modes (human vs computer, computer solver, assisted play)
-and search algorithms (BFS, DFS, Greedy, A*).
+and search algorithms (BFS, DFS, Greedy, A*, IDA*, Beam, parallel A*/BFS, portfolio).
 
 Game Components:
 - Grid system with colored blocks
@@ -17,6 +17,13 @@ Modules:
 - game.py: Core game logic
 - heuristics.py: AI heuristic functions  
 - search.py: Search algorithms
+- anytime.py: Search budgets, cancellation and partial results
+- hints.py: Background hint search for assisted mode
+- solution_cache.py: Persistent store of solved positions
+- tablebase.py: Endgame tablebases for small boards
+- pattern_database.py: Admissible pattern-database heuristic
+- parallel.py: Multi-process search algorithms and the solver portfolio
+- external.py: Disk-backed (external-memory) search
 - visuals/: UI components and menus
 """
 
@@ -27,7 +34,14 @@ from render import *
 from cst import *
 from game import *
 from heuristics import *
+from anytime import *
 from search import *
+from parallel import *
+from external import *
+from hints import *
+from solution_cache import *
+from tablebase import *
+from pattern_database import *
 from visuals.victory import *
 from visuals.levels import *
 from visuals.game_over import *
@@ -44,10 +58,12 @@ PROJECT_ROOT = Path(__file__).parent
 os.chdir(PROJECT_ROOT)
 sys.path.append(str(PROJECT_ROOT))
 
-# Initialize Pygame
-pygame.init()
-screen = pygame.display.set_mode((WIDTH, HEIGHT))
-pygame.display.set_caption("Wood Block Puzzle")
+# Initialize Pygame (only when run as the game: solver worker processes started
+# with the "spawn" method re-import this module and must not open a window)
+if __name__ == "__main__":
+    pygame.init()
+    screen = pygame.display.set_mode((WIDTH, HEIGHT))
+    pygame.display.set_caption("Wood Block Puzzle")
 clock = pygame.time.Clock()
 
 # Game state variables
@@ -116,16 +132,6 @@ def show_main_menu(screen):
                         return btn["action"]
                
 
-# Level configurations
-LEVEL_CONFIG = {
-    1: {"size": 4, "grid": [[1, 0, 0, 0], [1, 0, 0, 0], [0, 1, 1, 0], [0, 0, 0, 0]]},
-    2: {"size": 5, "grid": [[1, 0, 0, 0, 0], [1, 0, 0, 1, 0], [1, 0, 0, 1, 0], 
-                           [0, 0, 1, 1, 0], [0, 0, 1, 1, 0]]},
-    3: {"size": 6, "grid": [[1, 1, 0, 0, 0, 0], [1, 1, 0, 1, 1, 1], [0, 0, 0, 0, 0, 1],
-                           [0, 0, 0, 0, 1, 1], [0, 0, 0, 0, 1, 0], [0, 1, 0, 0, 0, 0]]}
-}
-
-
 
 def initialize_level(level):
     """Set up game state for a specific level.
@@ -144,6 +150,7 @@ def initialize_level(level):
             for row in config["grid"]]
     
     blocks = LEVEL_BLOCKS[level].copy()
+    build_placement_index(level, GRID_SIZE)  # Compile placement tables once per level
     target_moves = {1: 5, 2: 4, 3: 44}.get(level, 5)
     moves_made = 0
     score = 100
@@ -236,7 +243,7 @@ def human_mode(level, screen):
         pygame.display.flip()
         clock.tick(60)
 
-def pc_mode(algorithm, level, screen, heuristic=None):
+def pc_mode(algorithm, level, screen, heuristic=None, beam_width=BEAM_WIDTH):
     """Computer solver mode with visualization.
     
     Args:
@@ -244,6 +251,7 @@ def pc_mode(algorithm, level, screen, heuristic=None):
         level (int): Current level
         screen: Pygame display surface
         heuristic (function): Optional heuristic function
+        beam_width (int): States kept per depth by beam search
         
     Returns:
         str: Result state ("victory", "game_over", "quit")
@@ -251,30 +259,76 @@ def pc_mode(algorithm, level, screen, heuristic=None):
     global grid, blocks
     
     initialize_level(level)
-    initial_state = State([row.copy() for row in grid], blocks.copy(), GRID_SIZE)
+    # Solver mode: colors are replayed along the path but never split states
+    initial_state = State([row.copy() for row in grid], blocks.copy(), GRID_SIZE, color_agnostic=True)
     
-    # Algorithm selection
+    portfolio_winner = {}  # Member whose plan the portfolio returned
+
+    def run_portfolio(state, budget):
+        plan, portfolio_winner["name"] = portfolio(state, level, optimality=PORTFOLIO_OPTIMALITY,
+                                                   budget=budget)
+        return plan
+
+    # Algorithm selection (solver(state, budget) -> goal State or None)
     algorithms = {
-        "bfs": lambda s: bfs(s, level),
-        "dfs": lambda s: dfs(s, level),
-        "greedy": lambda s: greedy(s, heuristic_filled_cells, level),
-        "a_star": lambda s: a_star(s, combined_heuristic, level)
+        "bfs": lambda s, b: bfs(s, level, budget=b),
+        "dfs": lambda s, b: dfs(s, level, budget=b),
+        "greedy": lambda s, b: greedy(s, heuristic_filled_cells, level, budget=b),
+        "a_star": lambda s, b: a_star(s, load_pattern_database(level, s.grid_size), level, budget=b),
+        "ida_star": lambda s, b: ida_star(s, load_pattern_database(level, s.grid_size), level,
+                                          budget=b),
+        "beam": lambda s, b: beam_search(s, heuristic_filled_cells, level, beam_width, budget=b),
+        "hda_star": lambda s, b: hda_star(s, load_pattern_database(level, s.grid_size), level,
+                                          budget=b),
+        "parallel_bfs": lambda s, b: parallel_bfs(s, level, budget=b),
+        "external_bfs": lambda s, b: external_bfs(s, level, budget=b),
+        "portfolio": run_portfolio
     }
     
+    # Tabulated boards are answered exactly by the endgame tablebase, known
+    # positions are replayed from the solution cache (shortest plans for the
+    # optimal solvers, the solver's own plans otherwise); otherwise search
+    # (on budget-out the best partial plan is shown, then the game is lost)
+    optimal = algorithm in OPTIMAL_ALGORITHMS or \
+        (algorithm == "portfolio" and PORTFOLIO_OPTIMALITY == "optimal")
+    cache = SolutionCache()
     start_time = time.time()
-    solution_state = algorithms.get(algorithm)(initial_state)
-    elapsed_time = time.time() - start_time
+    table = load_tablebase(level, initial_state.grid_size)
+    if table is not None and not table.covers(initial_state):
+        table = None  # Sparse table of another starting board
+    cached = None
+    if table is None:
+        cached = cache.lookup(initial_state, level, optimal=optimal,
+                              algorithm=None if optimal else algorithm)
+    if table is not None:
+        solution, solved_by = table.solve(initial_state), "tablebase"
+        result = SearchResult(solution, None, None if solution else "unsolvable", 0,
+                              time.time() - start_time)
+    elif cached:
+        solution, solved_by = cached
+        result = SearchResult(solution, None, None, 0, time.time() - start_time)
+    else:
+        if algorithm in ("a_star", "ida_star", "hda_star", "portfolio"):
+            # Build missing pattern tables before the clock starts (forked
+            # solver processes inherit them)
+            load_pattern_database(level, initial_state.grid_size).load()
+        result = solve(algorithms.get(algorithm), initial_state, Budget(SEARCH_SECONDS))
+        solved_by = portfolio_winner.get("name") or algorithm
+        if result.solution:
+            cache.store(result.solution, level, solved_by, solved_by in OPTIMAL_ALGORITHMS)
+        if portfolio_winner.get("name"):
+            cache.record_win(level, PORTFOLIO_OPTIMALITY, solved_by, result.plan.moves,
+                             result.elapsed)
+    wins = cache.portfolio_wins(level, PORTFOLIO_OPTIMALITY) if algorithm == "portfolio" else {}
+    cache.close()
+    elapsed_time = result.elapsed
     
-    if not solution_state:
+    if not result.plan:
         return "game_over"
     
-    # Reconstruct solution path
-    path = []
-    current = solution_state
-    while current:
-        path.append(current)
-        current = current.parent
-    path.reverse()
+    # Reconstruct solution path (grids are replayed from the action chain)
+    path = result.plan.path()
+    path_grids = replay_grids(path)
 
     # Prepare move visualization
     move_info = []
@@ -308,8 +362,8 @@ def pc_mode(algorithm, level, screen, heuristic=None):
         
         # Update state from current move
         state = path[current_move]
-        grid = [row.copy() for row in state.grid]
-        blocks = state.blocks.copy()
+        grid = [row.copy() for row in path_grids[current_move]]
+        blocks = state.blocks
         
         # Render game
         screen.fill((139, 69, 19))
@@ -334,10 +388,24 @@ def pc_mode(algorithm, level, screen, heuristic=None):
         screen.blit(title, (panel_x + (panel_width - title.get_width())//2, y_offset))
         y_offset += 40
         
-        for text in [f"Level: {level}", f"Time: {elapsed_time:.2f}s", f"Moves: {current_move}/{len(path)-1}"]:
+        status = "Solved" if result.solution else f"Partial ({result.reason or 'no solution'})"
+        if table is not None:
+            status = "Exact (tablebase)" if result.solution else "Unsolvable (tablebase)"
+        elif cached:
+            status = f"Cached ({solved_by})"
+        elif algorithm == "portfolio" and result.solution:
+            status += f" by {solved_by}"
+        for text in [f"Level: {level}", f"Time: {elapsed_time:.2f}s", f"Moves: {current_move}/{len(path)-1}",
+                     status]:
             text_surface = fonts["info"].render(text, True, (240, 220, 180))
             screen.blit(text_surface, (panel_x + 15, y_offset))
             y_offset += 30
+        if wins:
+            # Portfolio record on this level, most frequent winners first
+            text = "Wins: " + ", ".join(f"{name} {count}" for name, count in list(wins.items())[:3])
+            text_surface = fonts["move"].render(text, True, (240, 220, 180))
+            screen.blit(text_surface, (panel_x + 15, y_offset))
+            y_offset += 25
         
         # Move history
         if current_move > 0:
@@ -367,7 +435,7 @@ def pc_mode(algorithm, level, screen, heuristic=None):
         pygame.display.flip()
         clock.tick(60)
     
-    return "victory"
+    return "victory" if result.solution else "game_over"
 
 def computer_assisted_human_mode(level, screen):
     """Human mode with computer hints.
@@ -386,18 +454,28 @@ def computer_assisted_human_mode(level, screen):
     selected_index = None
     hint_block = None
     hint_button = pygame.Rect(WIDTH - 150, HEIGHT - 70, 120, 50)
+    hint_worker = HintWorker(level)  # Searches in a background process
+    hint_worker.prefetch(grid, blocks, GRID_SIZE)
     
     while True:
         # Game state checks
         if no_valid_moves_left(grid, blocks, GRID_SIZE) or score <= 0:
+            hint_worker.close()
             return ("game_over", score)
         if all(cell == BLACK for row in grid for cell in row):
+            hint_worker.close()
             return ("victory", score)
+        
+        # Apply a hint that finished in the background
+        ready, hint = hint_worker.poll()
+        if ready:
+            hint_block = hint
 
         board_pos = render(screen, grid, blocks, score, GRID_SIZE)
         
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
+                hint_worker.close()
                 return "quit"
                 
             # Hint button or block selection
@@ -405,20 +483,11 @@ def computer_assisted_human_mode(level, screen):
                 x, y = event.pos
                 
                 if hint_button.collidepoint(x, y):
-                    score -= 30  # Hint cost
-                    current_state = State([row.copy() for row in grid], blocks.copy(), GRID_SIZE)
-                    solution_state = greedy(current_state, heuristic_filled_cells, level)
-                    
-                    if solution_state and solution_state.parent:
-                        path = []
-                        current = solution_state
-                        while current.parent:
-                            path.append(current)
-                            current = current.parent
-                        path.reverse()
-                        
-                        if path and path[0].action:
-                            hint_block = (*path[0].action,)
+                    if not hint_worker.thinking:
+                        score -= 30  # Hint cost
+                        hint_block = None
+                        # Runs in the background; applied by poll() when done
+                        hint_worker.request(grid, blocks, GRID_SIZE)
                 
                 # Block selection
                 elif HEIGHT-120 <= y <= HEIGHT:
@@ -452,6 +521,8 @@ def computer_assisted_human_mode(level, screen):
                                 blocks = LEVEL_BLOCKS[level].copy()
                             
                             hint_block = None
+                            hint_worker.cancel()  # Pending hint is for the old board
+                            hint_worker.prefetch(grid, blocks, GRID_SIZE)  # Ready before asked
                 
                 selected_block = None
                 dragging = False
@@ -468,7 +539,8 @@ def computer_assisted_human_mode(level, screen):
         # Draw hint button
         pygame.draw.rect(screen, (100, 70, 30), hint_button, border_radius=5)
         pygame.draw.rect(screen, (50, 30, 10), hint_button, 2, border_radius=5)
-        hint_text = pygame.font.SysFont("Arial", 24).render("HINT (-30)", True, (240, 220, 180))
+        label = "THINKING..." if hint_worker.thinking else "HINT (-30)"
+        hint_text = pygame.font.SysFont("Arial", 24).render(label, True, (240, 220, 180))
         screen.blit(hint_text, (hint_button.x + 20, hint_button.y + 15))
         
         # Draw hint
@@ -552,7 +624,8 @@ def main():
             #algorithm = show_algorithm_menu(screen)
             if algorithm == "back":
                 current_state = "game_mode"
-            elif algorithm in ["bfs", "dfs", "greedy", "a_star"]:
+            elif algorithm in ["bfs", "dfs", "greedy", "a_star", "ida_star", "beam", "hda_star", "parallel_bfs",
+                               "portfolio"]:
                 current_algorithm = algorithm
                 current_state = "level_select"
             elif algorithm == "quit":
@@ -579,7 +652,8 @@ def main():
                     algorithm=current_algorithm,
                     level=current_level,
                     screen=screen,
-                    heuristic=combined_heuristic if current_algorithm in ["greedy", "a_star"] else None
+                    heuristic=combined_heuristic if current_algorithm in ["greedy", "a_star", "ida_star", "beam", "hda_star"] else None,
+                    beam_width=algorithm_menu.beam_width
                 )
             elif game_mode == "assistant":
                 result = computer_assisted_human_mode(current_level, screen)
@@ -0,0 +1,566 @@
+"""
+Multi-process search algorithms for Wood Block Puzzle solver.
+
+This module contains:
+- Hash-distributed parallel A* (HDA*): every state is owned by the worker
+  process selected by its Zobrist key, each worker keeps its own open/closed
+  lists and successors travel between workers through queues
+- Layer-synchronous parallel BFS with hash-sharded visited sets
+- A solver portfolio racing the single-process solvers against each other
+- Helpers to ship compact state records between processes
+
+States cross process boundaries as plain tuples (occupancy, inventory as
+LEVEL_BLOCKS indices, g, key, colors, moves from the root). The parent process
+replays the winning move list from its own initial state, so callers get the
+same State path (with parent links) as the single-process solvers return.
+"""
+
+import heapq
+import itertools
+import multiprocessing
+import os
+import queue
+import time
+from cst import *
+from anytime import Budget, CancelToken
+from game import *
+from heuristics import *
+from search import *
+from pattern_database import load_pattern_database
+
+NO_SOLUTION = 2**62       # Incumbent cost before any goal is found
+_INVENTORY_INDICES = {}   # (inventory id, level) -> LEVEL_BLOCKS indices
+_INDEX_INVENTORIES = {}   # (indices, level) -> inventory id
+
+
+def _settings(state):
+    """
+    Per-search constants needed to rebuild nodes in another process.
+
+    Args:
+        state (State): Any state of the search
+
+    Returns:
+        tuple: (grid_size, tolerance, color_agnostic)
+    """
+    return (state.grid_size, state.tolerance, state.color_agnostic)
+
+
+def _pack(state, path, level):
+    """
+    Encode a node as a picklable record.
+
+    Args:
+        state (State): Node to ship
+        path (tuple): Move descriptors from the root to this node
+        level (int): Current game level (inventory is sent as block indices)
+
+    Returns:
+        tuple: (occupancy, block indices, moves, key, colors, path)
+    """
+    if (state.inventory, level) not in _INVENTORY_INDICES:
+        _INVENTORY_INDICES[state.inventory, level] = tuple(
+            LEVEL_BLOCKS[level].index(block) for block in state.blocks)
+    indices = _INVENTORY_INDICES[state.inventory, level]
+    return (state.occupancy, indices, state.moves, state.key, state.colors, path)
+
+
+def _unpack(record, level, settings):
+    """
+    Rebuild a detached node from a record produced by _pack().
+
+    Args:
+        record (tuple): Packed node
+        level (int): Current game level
+        settings (tuple): (grid_size, tolerance, color_agnostic) from _settings()
+
+    Returns:
+        tuple: (State, path)
+    """
+    occupancy, indices, moves, key, colors, path = record
+    if (indices, level) not in _INDEX_INVENTORIES:
+        _INDEX_INVENTORIES[indices, level] = intern_inventory(
+            [LEVEL_BLOCKS[level][i] for i in indices])
+    grid_size, tolerance, color_agnostic = settings
+    state = State.from_parts(occupancy, _INDEX_INVENTORIES[indices, level], grid_size,
+                             moves, key, tolerance, color_agnostic, colors)
+    return state, path
+
+
+def replay(initial_state, path, level):
+    """
+    Re-apply a list of moves from the initial state.
+
+    Args:
+        initial_state (State): Root the moves were generated from
+        path (tuple): Move descriptors in order
+        level (int): Current game level
+
+    Returns:
+        State: Final state, with a full parent chain back to initial_state
+    """
+    state = initial_state
+    for move in path:
+        state = state.apply(move, level)
+    return state
+
+
+def default_workers():
+    """
+    Number of worker processes used when none is requested.
+
+    Returns:
+        int: CPU count (at least 1)
+    """
+    return os.cpu_count() or 1
+
+
+def _stop_workers(processes, stop, queues):
+    """
+    Signal workers to finish, then reap them (terminating stragglers).
+
+    Args:
+        processes (list[Process]): Started worker processes
+        stop (Event): Shared stop flag
+        queues (list[Queue]): Queues to detach so exiting doesn't block on them
+    """
+    stop.set()
+    for q in queues:
+        q.cancel_join_thread()
+    deadline = time.time() + 1  # Grace period shared by all workers
+    for process in processes:
+        process.join(timeout=max(deadline - time.time(), 0))
+        if process.is_alive():
+            process.terminate()
+            process.join()
+
+
+def _hda_worker(worker_id, inboxes, results, work, incumbent, stop, settings,
+                level, heuristic, tie_break):
+    """
+    HDA* worker: owns the states whose key maps to worker_id.
+
+    Args:
+        worker_id (int): Index of this worker (and of its inbox)
+        inboxes (list[Queue]): One inbox per worker, receiving record batches
+        results (Queue): Receives (g, path) for every improving goal found
+        work (Value): Count of records alive anywhere (queued or open)
+        incumbent (Value): Cost of the best goal found by any worker
+        stop (Event): Set by the parent to end the search
+        settings (tuple): (grid_size, tolerance, color_agnostic)
+        level (int): Current game level
+        heuristic (function): Module-level heuristic (must be picklable)
+        tie_break (str): Key of search.TIE_BREAKS
+
+    Notes:
+        - `work` is incremented before records are sent and decremented once
+          a record is dropped or expanded, so it only reaches 0 when every
+          open list is empty and no batch is in flight
+        - States with f >= incumbent are pruned (optimal if h is admissible)
+    """
+    for q in inboxes + [results]:
+        q.cancel_join_thread()  # Never block exit on undelivered batches
+    inbox = inboxes[worker_id]
+    n_workers = len(inboxes)
+    tie = TIE_BREAKS[tie_break]
+    counter = itertools.count()
+    heap = []
+    open_g = {}
+    closed = set()
+
+    def receive(batch):
+        """Push new or improved records onto the open list; return drop count."""
+        dropped = 0
+        for record in batch:
+            state, path = _unpack(record, level, settings)
+            key = state.key
+            if key in closed or open_g.get(key, state.moves + 1) <= state.moves:
+                dropped += 1
+                continue
+            open_g[key] = state.moves
+            h = heuristic(state)
+            heapq.heappush(heap, (state.moves + h, h, tie(state.moves), next(counter), state, path))
+        return dropped
+
+    while not stop.is_set():
+        # Drain the inbox (block briefly only when there is nothing to expand)
+        try:
+            while True:
+                batch = inbox.get_nowait() if heap else inbox.get(timeout=0.01)
+                if (dropped := receive(batch)):
+                    with work.get_lock():
+                        work.value -= dropped
+        except queue.Empty:
+            pass
+        if not heap:
+            continue
+
+        f, _, _, _, state, path = heapq.heappop(heap)
+        key = state.key
+        if key in closed or state.moves > open_g[key] or f >= incumbent.value:
+            with work.get_lock():
+                work.value -= 1  # Stale, closed or pruned by the incumbent
+            continue
+        closed.add(key)
+        del open_g[key]
+
+        outgoing = [[] for _ in range(n_workers)]
+        for move in state.expand(level):
+            successor = state.apply(move, level)
+            child_path = path + (move,)
+            if successor.is_goal():
+                with incumbent.get_lock():
+                    if successor.moves < incumbent.value:
+                        incumbent.value = successor.moves
+                        results.put((successor.moves, child_path))
+                continue
+            outgoing[successor.key % n_workers].append(_pack(successor, child_path, level))
+
+        # Count children before anyone can consume them, then release this node
+        local = outgoing[worker_id]
+        outgoing[worker_id] = []
+        with work.get_lock():
+            work.value += sum(len(batch) for batch in outgoing) + len(local) - 1
+        for owner, batch in enumerate(outgoing):
+            if batch:
+                inboxes[owner].put(batch)
+        if (dropped := receive(local)):
+            with work.get_lock():
+                work.value -= dropped
+
+
+def hda_star(initial_state, heuristic, level, workers=None, tie_break="deep", budget=None):
+    """
+    Hash-distributed parallel A* across worker processes.
+
+    Args:
+        initial_state (State): Starting puzzle configuration
+        heuristic (function): Module-level heuristic function (picklable)
+        level (int): Current game level
+        workers (int): Number of worker processes (default: CPU count)
+        tie_break (str): Rule for equal (f, h) values, a key of TIE_BREAKS
+        budget (Budget): Time / memory limits (memory counts the workers,
+            see Budget.watch()), progress and cancellation, checked by the
+            parent while it waits (node limits don't apply)
+
+    Returns:
+        State: Best solved state found within budget (parent chain back to
+        initial_state), None if none was found
+
+    Notes:
+        - Each state is owned by worker `key % workers`; owners alone dedupe
+          and expand it, so no locks guard the open/closed lists
+        - Successors are sent to their owners in per-expansion batches
+        - Runs until every open list is empty (optimal with an admissible
+          heuristic); when the budget runs out the best goal so far is returned
+        - Progress reports the number of live records as the frontier size
+    """
+    budget = (budget or Budget()).start()
+    if initial_state.is_goal():
+        return initial_state
+    workers = workers or default_workers()
+    context = multiprocessing.get_context()
+    inboxes = [context.Queue() for _ in range(workers)]
+    results = context.Queue()
+    work = context.Value("q", 1)
+    incumbent = context.Value("q", NO_SOLUTION)
+    stop = context.Event()
+    settings = _settings(initial_state)
+
+    processes = [
+        context.Process(target=_hda_worker, daemon=True,
+                        args=(i, inboxes, results, work, incumbent, stop, settings,
+                              level, heuristic, tie_break))
+        for i in range(workers)
+    ]
+    for process in processes:
+        process.start()
+    budget.watch(process.pid for process in processes)
+    inboxes[initial_state.key % workers].put([_pack(initial_state, (), level)])
+
+    best = None
+    try:
+        while True:
+            try:
+                cost, path = results.get(timeout=0.01)
+                if best is None or cost < best[0]:
+                    best = (cost, path)
+                continue
+            except queue.Empty:
+                pass
+            if work.value <= 0:
+                break  # Every open list drained: search complete
+            if budget.check(work.value):
+                break
+        # Goals are published before `work` drops, but queue delivery is
+        # asynchronous: wait for the report matching the shared incumbent
+        # (if it never arrives, keep the best plan already received)
+        while incumbent.value < NO_SOLUTION and (best is None or best[0] > incumbent.value):
+            try:
+                cost, path = results.get(timeout=5)
+            except queue.Empty:
+                break
+            if best is None or cost < best[0]:
+                best = (cost, path)
+    finally:
+        _stop_workers(processes, stop, inboxes + [results])
+
+    if best is None:
+        return None
+    return replay(initial_state, best[1], level)
+
+
+BFS_BATCH = 1000  # Records per message when routing a BFS layer to shard owners
+
+
+def _bfs_worker(worker_id, inboxes, control, results, settings, level, root_record):
+    """
+    Layer-synchronous BFS worker owning one hash shard of the visited set.
+
+    Args:
+        worker_id (int): Index of this worker (and of its inbox/shard)
+        inboxes (list[Queue]): One inbox per worker, receiving record batches
+            followed by one None end-of-layer marker from every worker
+        control (Queue): Commands from the parent ("expand" or "stop")
+        results (Queue): Per-layer report (worker_id, goal path, frontier size)
+        settings (tuple): (grid_size, tolerance, color_agnostic)
+        level (int): Current game level
+        root_record (tuple): Packed initial state, kept by its owner only
+
+    Notes:
+        - Expand phase: expands this worker's frontier and routes children
+          to the worker owning `key % workers`
+        - Merge phase: dedupes the received children against the local
+          visited shard; survivors form the next frontier. The shard is never
+          shared, so no locking is needed
+    """
+    for q in inboxes + [results]:
+        q.cancel_join_thread()  # Never block exit on undelivered batches
+    n_workers = len(inboxes)
+    inbox = inboxes[worker_id]
+    owns_root = root_record[3] % n_workers == worker_id
+    frontier = [root_record] if owns_root else []
+    visited = {root_record[3]} if owns_root else set()
+
+    while control.get() == "expand":
+        # Expand phase
+        goal = None
+        outgoing = [[] for _ in range(n_workers)]
+        for record in frontier:
+            state, path = _unpack(record, level, settings)
+            for move in state.expand(level):
+                successor = state.apply(move, level)
+                if successor.is_goal():
+                    goal = path + (move,)
+                    break
+                owner = successor.key % n_workers
+                outgoing[owner].append(_pack(successor, path + (move,), level))
+                if len(outgoing[owner]) >= BFS_BATCH:
+                    inboxes[owner].put(outgoing[owner])
+                    outgoing[owner] = []
+            if goal:
+                break
+        frontier = None
+        for owner, batch in enumerate(outgoing):
+            if batch:
+                inboxes[owner].put(batch)
+            inboxes[owner].put(None)  # End of this worker's layer
+
+        # Merge phase
+        frontier = []
+        markers = 0
+        while markers < n_workers:
+            batch = inbox.get()
+            if batch is None:
+                markers += 1
+                continue
+            for record in batch:
+                if record[3] not in visited:
+                    visited.add(record[3])
+                    frontier.append(record)
+        results.put((worker_id, goal, len(frontier)))
+
+
+def parallel_bfs(initial_state, level, workers=None, budget=None):
+    """
+    Layer-synchronous parallel Breadth-First Search with sharded visited sets.
+
+    Args:
+        initial_state (State): Starting puzzle configuration
+        level (int): Current game level
+        workers (int): Number of worker processes (default: CPU count)
+        budget (Budget): Time / memory limits (memory counts the workers,
+            see Budget.watch()), progress and cancellation, checked by the
+            parent while it waits (node limits don't apply)
+
+    Returns:
+        State: The solved state if found within budget (parent chain back
+        to initial_state), None otherwise
+
+    Notes:
+        - Every depth layer is split across the workers by state hash; each
+          worker expands its part and the children are merged by their
+          owners between layers
+        - Layers advance in lockstep and goals are detected on generation,
+          so the solution is a shortest one, exactly like bfs()
+        - Progress reports the size of the last completed layer
+    """
+    budget = (budget or Budget()).start()
+    if initial_state.is_goal():
+        return initial_state
+    workers = workers or default_workers()
+    context = multiprocessing.get_context()
+    inboxes = [context.Queue() for _ in range(workers)]
+    controls = [context.Queue() for _ in range(workers)]
+    results = context.Queue()
+    stop = context.Event()
+    settings = _settings(initial_state)
+    root_record = _pack(initial_state, (), level)
+
+    processes = [
+        context.Process(target=_bfs_worker, daemon=True,
+                        args=(i, inboxes, controls[i], results, settings, level, root_record))
+        for i in range(workers)
+    ]
+    for process in processes:
+        process.start()
+    budget.watch(process.pid for process in processes)
+
+    layer_size = 1
+    try:
+        while True:
+            for control in controls:
+                control.put("expand")
+            reports = []
+            while len(reports) < workers:
+                try:
+                    reports.append(results.get(timeout=0.05))
+                except queue.Empty:
+                    if budget.check(layer_size):
+                        return None
+            goals = sorted((worker_id, goal) for worker_id, goal, _ in reports if goal)
+            if goals:
+                return replay(initial_state, goals[0][1], level)
+            layer_size = sum(size for _, _, size in reports)
+            if not layer_size:
+                return None  # Search space exhausted
+    finally:
+        for control in controls:
+            control.put("stop")
+        _stop_workers(processes, stop, inboxes + controls + [results])
+
+
+# Portfolio members: name -> (solver(state, level, budget), optimality rank).
+# Rank 2 returns shortest plans (BFS, and A*/IDA* on the admissible pattern
+# database), rank 1 is f-ordered search on a heuristic that may
+# overestimate, rank 0 returns any plan.
+PORTFOLIO = {
+    "bfs": (lambda s, level, b: bfs(s, level, budget=b), 2),
+    "dfs": (lambda s, level, b: dfs(s, level, budget=b), 0),
+    "greedy": (lambda s, level, b: greedy(s, heuristic_filled_cells, level, budget=b), 0),
+    "a_star": (lambda s, level, b: a_star(s, load_pattern_database(level, s.grid_size), level,
+                                          budget=b), 2),
+    "ida_star": (lambda s, level, b: ida_star(s, load_pattern_database(level, s.grid_size), level,
+                                              budget=b), 2),
+    "beam": (lambda s, level, b: beam_search(s, heuristic_filled_cells, level, BEAM_WIDTH, budget=b), 0),
+}
+OPTIMALITY = {"any": 0, "heuristic": 1, "optimal": 2}  # Minimum rank accepted
+
+
+def _portfolio_worker(name, record, settings, level, results, stop):
+    """
+    Portfolio member process: runs one solver until it ends or is cancelled.
+
+    Args:
+        name (str): Key of PORTFOLIO
+        record (tuple): Packed initial state
+        settings (tuple): (grid_size, tolerance, color_agnostic)
+        level (int): Current game level
+        results (Queue): Receives (name, move descriptors or None)
+        stop (Event): Set by the parent to cancel the race
+
+    Notes:
+        - The single report must be flushed before exit, so unlike the other
+          workers this one keeps the queue's join-on-exit behaviour; reports
+          made after cancellation carry no moves and stay small
+    """
+    state, _ = _unpack(record, level, settings)
+    solver = PORTFOLIO[name][0]
+    solution = solver(state, level, Budget(None, cancel=CancelToken(stop)))
+    if solution is not None and not stop.is_set():
+        results.put((name, tuple(node.move for node in solution.path()[1:])))
+    else:
+        results.put((name, None))
+
+
+def portfolio(initial_state, level, solvers=None, optimality="any", budget=None):
+    """
+    Race several solvers in parallel processes and keep the first good plan.
+
+    Args:
+        initial_state (State): Starting puzzle configuration
+        level (int): Current game level
+        solvers (list[str]): PORTFOLIO names to run (default: all)
+        optimality (str): Key of OPTIMALITY; the first plan from a solver of
+            at least that rank wins and the other solvers are cancelled
+        budget (Budget): Time / memory limits (memory counts the workers,
+            see Budget.watch()), progress and cancellation, checked by the
+            parent while it waits
+
+    Returns:
+        tuple: (plan, winner) where plan is the winning goal State (parent
+        chain back to initial_state) or, if no qualifying solver succeeds,
+        the shortest plan from the others, and winner is the PORTFOLIO name
+        that found it; (None, None) if nobody found one
+
+    Notes:
+        - Callers keep the win record (see SolutionCache.record_win())
+        - Members run without their own time limit: the parent's budget
+          cancels them all through a shared stop event
+    """
+    budget = (budget or Budget()).start()
+    if initial_state.is_goal():
+        return initial_state, None
+    names = list(solvers or PORTFOLIO)
+    required = OPTIMALITY[optimality]
+    context = multiprocessing.get_context()
+    results = context.Queue()
+    stop = context.Event()
+    record = _pack(initial_state, (), level)
+    settings = _settings(initial_state)
+
+    processes = [
+        context.Process(target=_portfolio_worker, daemon=True,
+                        args=(name, record, settings, level, results, stop))
+        for name in names
+    ]
+    for process in processes:
+        process.start()
+    budget.watch(process.pid for process in processes)
+
+    winner = None
+    fallback = None
+    running = len(names)
+    try:
+        while running:
+            try:
+                name, moves = results.get(timeout=0.01)
+            except queue.Empty:
+                if budget.check(running):
+                    break
+                continue
+            running -= 1
+            if moves is None:
+                continue
+            if PORTFOLIO[name][1] >= required:
+                winner = (name, moves)
+                break
+            if fallback is None or len(moves) < len(fallback[1]):
+                fallback = (name, moves)
+    finally:
+        _stop_workers(processes, stop, [results])
+
+    best = winner or fallback
+    if best is None:
+        return None, None
+    return replay(initial_state, best[1], level), best[0]
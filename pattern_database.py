@@ -0,0 +1,268 @@
+"""
+Pattern-database heuristic for Wood Block Puzzle solver.
+
+This module contains PatternDatabase, an admissible heuristic for A* and
+IDA* built from projections of the board onto bands of rows and columns.
+
+Every band is solved exactly as an abstract puzzle: placements are
+projected onto the band, and a line through the band may be cleared as
+soon as its part inside the band is full (lines spanning the whole board
+width or height must be, like in the real game). Every real move maps to
+an abstract move, so the number of moves needed to empty a band never
+exceeds the moves needed to empty the board, and the maximum over bands
+is still a lower bound.
+
+The distances of a band are a byte array indexed like the tablebase
+(`projection << blocks | inventory bits`, see tablebase.py), computed by
+the same retrograde BFS and saved to TABLEBASE_DIR. Tables can be built
+offline; otherwise they are built when first loaded (about 12 s for a 6x6
+level) and later runs only read them back.
+
+The bound is tight on small boards (levels 1 and 2: 53 and 113 A*
+expansions for the 5- and 4-move optima) but weak on 6x6 (2 at the start
+of level 3, where A* doesn't finish within a minute).
+
+Usage:
+    python pattern_database.py LEVEL SIZE
+"""
+
+import os
+import sys
+from array import array
+from cst import *
+from utils import *
+from tablebase import (TABLE_FORMAT, TABLE_HEADER, TABLE_MAGIC, _inventory_bits, level_digest,
+                       retrograde_distances)
+
+_DATABASES = {}  # (level, grid_size) -> PatternDatabase
+_TABLES = {}     # (level, grid_size, band) -> distance table
+
+
+def band_patterns(grid_size, max_cells=PDB_MAX_CELLS):
+    """
+    Bands of rows and columns used as projections.
+
+    Bands are as thick as max_cells allows and cover the board; the last
+    band overlaps its neighbour rather than being thinner.
+
+    Args:
+        grid_size (int): Board size N (N x N)
+        max_cells (int): Maximum cells per band (table size grows as
+            2 ** cells)
+
+    Returns:
+        list[tuple]: (x, y, width, height) rectangles
+    """
+    thickness = max(1, min(grid_size, max_cells // grid_size))
+    starts = sorted({min(start, grid_size - thickness)
+                     for start in range(0, grid_size, thickness)})
+    return ([(0, y, grid_size, thickness) for y in starts] +
+            [(x, 0, thickness, grid_size) for x in starts])
+
+
+def _chunks(band, grid_size):
+    """
+    Bit runs copied by a projection.
+
+    Returns:
+        list[tuple]: (board shift, width mask, band shift) per run; rows of
+        a full-width band are one contiguous run
+    """
+    x, y, width, height = band
+    if width == grid_size:
+        return [(y * grid_size, (1 << width * height) - 1, 0)]
+    return [((y + row) * grid_size + x, (1 << width) - 1, row * width) for row in range(height)]
+
+
+def project(occupancy, chunks):
+    """
+    Projection of a board bitmask onto a band.
+
+    Args:
+        occupancy (int): Board bitmask
+        chunks (list[tuple]): Output of _chunks()
+
+    Returns:
+        int: Band bitmask (bit `row * width + column`)
+    """
+    projection = 0
+    for shift, mask, out in chunks:
+        projection |= (occupancy >> shift & mask) << out
+    return projection
+
+
+def build_pattern(level, band, grid_size):
+    """
+    Distance table of one band (abstract moves to an empty band).
+
+    Args:
+        level (int): Game level (selects LEVEL_BLOCKS)
+        band (tuple): (x, y, width, height) rectangle
+        grid_size (int): Board size
+
+    Returns:
+        bytearray: See retrograde_distances()
+
+    Notes:
+        - Lines through the band are cleared when full if they lie inside
+          it, and may or may not be cleared otherwise (the rest of the line
+          is unknown), so every subset of those is a successor
+    """
+    _, _, width, height = band
+    chunks = _chunks(band, grid_size)
+    lines = [(((1 << width) - 1) << row * width, width == grid_size) for row in range(height)]
+    lines += [(sum(1 << row * width + column for row in range(height)), height == grid_size)
+              for column in range(width)]
+    masks = [sorted({project(mask, chunks) for _, _, _, mask in get_placements(block, grid_size)})
+             for block, _ in LEVEL_BLOCKS[level]]
+
+    predecessors = [array("I") for _ in range(1 << width * height)]
+    for occupancy in range(1 << width * height):
+        for b, block_masks in enumerate(masks):
+            reached = set()
+            for mask in block_masks:
+                if occupancy & mask:
+                    continue
+                placed = occupancy | mask
+                afters = {placed & ~sum(line for line, forced in lines
+                                        if forced and placed & line == line)}
+                for line, forced in lines:
+                    if not forced and placed & line == line:
+                        afters |= {after & ~line for after in afters}
+                reached |= afters
+            for after in reached:
+                predecessors[after].append(occupancy << 3 | b)
+    return retrograde_distances(predecessors, len(LEVEL_BLOCKS[level]))
+
+
+def pattern_path(level, band, grid_size, directory=TABLEBASE_DIR):
+    """File name of the table of one band."""
+    return os.path.join(directory, "level{}_{}x{}_band{}_{}_{}x{}.pdb".format(
+        level, grid_size, grid_size, *band))
+
+
+def load_pattern(level, band, grid_size):
+    """
+    Distance table of one band, read from disk or built and saved.
+
+    Returns:
+        bytearray: See build_pattern(); files that don't match the level's
+        blocks are rebuilt, and unwritable directories only skip saving
+    """
+    path = pattern_path(level, band, grid_size)
+    blocks = len(LEVEL_BLOCKS[level])
+    header = TABLE_HEADER.pack(TABLE_MAGIC, TABLE_FORMAT, grid_size, blocks, level_digest(level))
+    try:
+        with open(path, "rb") as table_file:
+            data = table_file.read()
+        if data[:TABLE_HEADER.size] == header and \
+                len(data) == TABLE_HEADER.size + (1 << band[2] * band[3] + blocks):
+            return bytearray(data[TABLE_HEADER.size:])
+    except OSError:
+        pass
+    table = build_pattern(level, band, grid_size)
+    try:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "wb") as out:
+            out.write(header)
+            out.write(table)
+    except OSError:
+        pass
+    return table
+
+
+class PatternDatabase:
+    """
+    Admissible heuristic: max over band pattern databases.
+
+    Call it like the functions of heuristics.py: `database(state)`. Tables
+    are loaded on the first call (and shared by every database of the same
+    level and board size), so instances are cheap to create and pickle.
+
+    Attributes:
+        level (int): Game level
+        grid_size (int): Board size
+        bands (list[tuple]): (x, y, width, height) projections
+    """
+
+    def __init__(self, level, grid_size, max_cells=PDB_MAX_CELLS):
+        """
+        Args:
+            level (int): Game level (the heuristic depends on its blocks)
+            grid_size (int): Board size
+            max_cells (int): Maximum cells per band
+        """
+        self.level = level
+        self.grid_size = grid_size
+        self.bands = band_patterns(grid_size, max_cells)
+        self._tables = None
+        self._inventories = {}  # Interned inventory id -> inventory bits
+
+    def __getstate__(self):
+        # Tables are rebuilt lazily; inventory ids are only valid per process
+        return {"level": self.level, "grid_size": self.grid_size, "bands": self.bands}
+
+    def __setstate__(self, state):
+        self.__dict__.update(state, _tables=None, _inventories={})
+
+    def load(self):
+        """
+        Load (or reuse) the table of every band now.
+
+        Callers running the heuristic under a Budget call this first, so
+        building missing tables isn't charged to the search. Processes forked
+        afterwards inherit the loaded tables.
+
+        Returns:
+            PatternDatabase: self
+        """
+        self._tables = []
+        for band in self.bands:
+            if (self.level, self.grid_size, band) not in _TABLES:
+                _TABLES[self.level, self.grid_size, band] = load_pattern(self.level, band,
+                                                                         self.grid_size)
+            self._tables.append((_chunks(band, self.grid_size),
+                                 _TABLES[self.level, self.grid_size, band]))
+        return self
+
+    def __call__(self, state):
+        """
+        Lower bound on the moves from a state to the goal.
+
+        Args:
+            state (State): State to evaluate
+
+        Returns:
+            int: Max band distance (UNSOLVABLE if a band can't be emptied),
+            0 for inventories with blocks foreign to the level
+        """
+        if self._tables is None:
+            self.load()
+        if state.inventory not in self._inventories:
+            self._inventories[state.inventory] = _inventory_bits(state.blocks, self.level)
+        inventory = self._inventories[state.inventory]
+        if inventory is None:
+            return 0
+        shift = len(LEVEL_BLOCKS[self.level])
+        return max(table[project(state.occupancy, chunks) << shift | inventory]
+                   for chunks, table in self._tables)
+
+
+def load_pattern_database(level, grid_size):
+    """
+    Shared PatternDatabase of a level and board size.
+
+    Returns:
+        PatternDatabase: Heuristic (tables loaded on its first call)
+    """
+    if (level, grid_size) not in _DATABASES:
+        _DATABASES[level, grid_size] = PatternDatabase(level, grid_size)
+    return _DATABASES[level, grid_size]
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3:
+        sys.exit(__doc__)
+    level, grid_size = int(sys.argv[1]), int(sys.argv[2])
+    for band in load_pattern_database(level, grid_size).load().bands:
+        print(pattern_path(level, band, grid_size))
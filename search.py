@@ -1,87 +1,145 @@
 from collections import deque
 import heapq
+import itertools
 from cst import *
-import time
+from anytime import Budget
+from tables import BloomFilter
+from utils import popcount
 
-def bfs(initial_state, level):
+# Tie-breaking rules for informed search frontiers. Heap entries are
+# (f, h, tie, counter, state): ties on f fall through to h, then to the rule
+# below applied to g, then to the insertion counter, so heapq never has to
+# compare State objects (and never re-evaluates a heuristic while sifting).
+TIE_BREAKS = {
+    "deep": lambda g: -g,    # Prefer deeper states (reach goals sooner)
+    "shallow": lambda g: g,  # Prefer shallower states
+    "fifo": lambda g: 0,     # Insertion order only
+}
+
+def _improves_open(state, visited, open_g):
+    """
+    Open-set index check used before pushing onto a priority frontier.
+    
+    Args:
+        state (State): Candidate successor
+        visited (set): Hashes of closed (expanded) states (any table with `in`)
+        open_g (dict): Best g queued so far for each open state hash
+        
+    Returns:
+        bool: True if the state should be pushed (new, or a better g)
+        
+    Notes:
+        - Worse or equal duplicates are dropped at push time
+        - A better g is recorded and pushed again (lazy decrease-key); the
+          superseded heap entry is skipped when popped
+    """
+    h = hash(state)
+    if h in visited or open_g.get(h, state.moves + 1) <= state.moves:
+        return False
+    open_g[h] = state.moves
+    return True
+
+def bfs(initial_state, level, visited=None, budget=None):
     """
     Performs Breadth-First Search to find the optimal solution to the wood block puzzle.
     
     Args:
         initial_state (State): The starting configuration of the puzzle
         level (int): Current game level, used to determine valid moves
+        visited: Duplicate-detection table with `in`/`add` (default: a new
+            set; pass a tables.VisitedTable to cap memory)
+        budget (Budget): Search limits and progress reporting (default:
+            Budget(), i.e. SEARCH_SECONDS)
         
     Returns:
-        State: The solved state if found within time limit, None otherwise
+        State: The solved state if found within budget, None otherwise
         
     Notes:
         - Explores all possible states level by level
         - Guarantees shortest path solution (optimal moves)
         - Uses deque for O(1) popleft operations
         - Tracks visited states using hash for memory efficiency
-        - Implements 15-second timeout for large puzzles
+        - Stops when the budget runs out (budget.best keeps the expanded
+          state with the fewest filled cells as a partial plan)
+        - Goal-tests children as they are generated (still shortest with
+          unit move costs) and stops without building the remaining siblings
     """
-    start_time = time.time()
+    budget = (budget or Budget()).start()
+    if initial_state.is_goal():
+        return initial_state
     queue = deque([initial_state])
-    visited = {hash(initial_state)}
+    visited = set() if visited is None else visited
+    visited.add(hash(initial_state))
 
     while queue:
-        if time.time() - start_time > 15:
-            print("BFS: Time limit exceeded (15 seconds)")
-            return None
-            
         state = queue.popleft()
-        
-        if state.is_goal():
-            return state
+        if budget.tick(state, popcount(state.occupancy), len(queue)):
+            return None
 
-        for successor in state.get_successors(level):
+        for move in state.expand(level):
+            successor = state.apply(move, level)
+            if successor.is_goal():
+                return successor
             if (h := hash(successor)) not in visited:
                 visited.add(h)
                 queue.append(successor)
 
     return None
 
-def dfs(initial_state, level):
+def dfs(initial_state, level, visited=None, budget=None):
     """
     Performs Depth-First Search to solve the puzzle (non-optimal solution).
     
     Args:
         initial_state (State): Starting puzzle configuration
         level (int): Current game level for move validation
+        visited: Duplicate-detection table with `in`/`add` (default: a new
+            set); a tables.BloomFilter gives a fixed-memory approximate mode
+        budget (Budget): Search limits and progress reporting
         
     Returns:
-        State: Solved state if found within time limit, None otherwise
+        State: Solved state if found within budget, None otherwise
         
     Notes:
         - Explores by going deep first (memory efficient for deep solutions)
         - Doesn't guarantee optimal solutions
-        - Processes successors in reverse order to maintain left-to-right exploration
+        - Stack holds (state, lazy move iterator) pairs, so children are
+          built one at a time in left-to-right order and siblings of a goal
+          child are never materialized
         - Implements cycle detection via visited set
+        - With a BloomFilter, false positives prune unvisited states: the
+          search may miss solutions, but fits far more states in the same
+          memory (check visited.false_positive_rate() afterwards)
     """
-    start_time = time.time()
-    stack = [initial_state]
-    visited = set()
+    budget = (budget or Budget()).start()
+    if initial_state.is_goal():
+        return initial_state
+    stack = [(initial_state, initial_state.expand(level))]
+    visited = set() if visited is None else visited
+    visited.add(hash(initial_state))
 
     while stack:
-        if time.time() - start_time > 15:
-            print("DFS: Time limit exceeded (15 seconds)")
-            return None
+        state, moves = stack[-1]
+        move = next(moves, None)
+        if move is None:
+            stack.pop()  # All children explored - backtrack
+            continue
             
-        state = stack.pop()
-        
-        if state.is_goal():
-            return state
+        successor = state.apply(move, level)
+        if successor.is_goal():
+            return successor
             
-        if (h := hash(state)) in visited:
+        if (h := hash(successor)) in visited:
             continue
             
         visited.add(h)
-        stack.extend(reversed(state.get_successors(level)))
+        stack.append((successor, successor.expand(level)))
+        if budget.tick(successor, popcount(successor.occupancy), len(stack)):
+            return None
 
     return None
 
-def greedy(initial_state, heuristic, level):
+def greedy(initial_state, heuristic, level, tie_break="fifo", visited=None, budget=None):
     """
     Greedy Best-First Search using heuristic evaluation.
     
@@ -89,40 +147,67 @@ def greedy(initial_state, heuristic, level):
         initial_state (State): Starting puzzle configuration
         heuristic (function): Function that evaluates state quality (h(n))
         level (int): Current game level
+        tie_break (str): Rule for equal h values, a key of TIE_BREAKS
+        visited: Closed-set table with `in`/`add` (default: a new set); a
+            tables.BloomFilter gives a fixed-memory approximate mode
+        budget (Budget): Search limits and progress reporting
         
     Returns:
-        State: Solved state if found within time limit, None otherwise
+        State: Solved state if found within budget, None otherwise
         
     Notes:
         - Prioritizes states with best heuristic value
         - No consideration of path cost (g(n))
         - May find solutions quickly but not necessarily optimal
         - Uses priority queue (min-heap) for state selection
+        - Heap keys are precomputed (h, h, tie, counter) integers
+        - Open-set index drops duplicate pushes that don't improve g
+        - Goal-tests children lazily as they are generated, so a hint can
+          return at the first goal child without building its siblings
+        - With a BloomFilter, states are recorded when queued and there is
+          no exact open-set index: duplicate detection uses only the
+          filter's fixed memory, and false positives drop unseen states
+          (incomplete, but a fixed footprint for any-solution hints)
     """
-    start_time = time.time()
-    heap = [(heuristic(initial_state.grid, initial_state.blocks), initial_state)]
-    visited = set()
+    budget = (budget or Budget()).start()
+    if initial_state.is_goal():
+        return initial_state
+    tie = TIE_BREAKS[tie_break]
+    counter = itertools.count()
+    h0 = heuristic(initial_state)
+    heap = [(h0, h0, tie(initial_state.moves), next(counter), initial_state)]
+    visited = set() if visited is None else visited
+    if isinstance(visited, BloomFilter):
+        open_g = None  # Approximate mode: the filter is the only index
+        visited.add(hash(initial_state))
+    else:
+        open_g = {hash(initial_state): initial_state.moves}
 
     while heap:
-        if time.time() - start_time > 15:
-            print("Greedy: Time limit exceeded (15 seconds)")
-            return None
-            
-        _, state = heapq.heappop(heap)
+        entry = heapq.heappop(heap)
+        state = entry[-1]
         
-        if state.is_goal():
-            return state
-            
-        if (h := hash(state)) in visited:
-            continue
-            
-        visited.add(h)
-        for successor in state.get_successors(level):
-            heapq.heappush(heap, (heuristic(successor.grid, successor.blocks), successor))
+        if open_g is not None:
+            # Closed, or superseded by a better-g entry (no entry: already
+            # expanded, but a full visited table refused its key)
+            if (h := hash(state)) in visited or state.moves > open_g.get(h, -1):
+                continue
+            visited.add(h)
+            del open_g[h]
+        if budget.tick(state, entry[1], len(heap)):
+            return None
+        for move in state.expand(level):
+            successor = state.apply(move, level)
+            if successor.is_goal():
+                return successor
+            if visited.add(hash(successor)) if open_g is None else \
+                    _improves_open(successor, visited, open_g):
+                h_value = heuristic(successor)
+                heapq.heappush(heap, (h_value, h_value, tie(successor.moves), next(counter), successor))
 
     return None
 
-def a_star(initial_state, heuristic, level):
+def a_star(initial_state, heuristic, level, tie_break="deep", visited=None, budget=None):
     """
     A* Search combining path cost and heuristic (f(n) = g(n) + h(n)).
     
@@ -130,34 +215,180 @@ def a_star(initial_state, heuristic, level):
         initial_state (State): Starting puzzle configuration
         heuristic (function): Admissible heuristic function (never overestimates)
         level (int): Current game level
+        tie_break (str): Rule for equal (f, h) values, a key of TIE_BREAKS
+        visited: Closed-set table with `in`/`add` (default: a new set)
+        budget (Budget): Search limits and progress reporting
         
     Returns:
-        State: Solved state if found within time limit, None otherwise
+        State: Solved state if found within budget, None otherwise
         
     Notes:
         - Finds optimal solutions when heuristic is admissible
         - Balances between path cost and heuristic estimate
         - More efficient than BFS for large state spaces with good heuristic
+        - Heap keys are precomputed (f, h, tie, counter) integers
+        - Open-set index drops duplicate pushes that don't improve g
     """
-    start_time = time.time()
-    heap = [(heuristic(initial_state.grid, initial_state.blocks) + initial_state.moves, initial_state)]
-    visited = set()
+    budget = (budget or Budget()).start()
+    tie = TIE_BREAKS[tie_break]
+    counter = itertools.count()
+    h0 = heuristic(initial_state)
+    heap = [(h0 + initial_state.moves, h0, tie(initial_state.moves), next(counter), initial_state)]
+    open_g = {hash(initial_state): initial_state.moves}
+    visited = set() if visited is None else visited
 
     while heap:
-        if time.time() - start_time > 15:
-            print("A*: Time limit exceeded (15 seconds)")
-            return None
-            
-        _, state = heapq.heappop(heap)
+        entry = heapq.heappop(heap)
+        state = entry[-1]
         
         if state.is_goal():
             return state
             
-        if (h := hash(state)) in visited:
+        # Closed, or superseded by a better-g entry (no entry: already
+        # expanded, but a full visited table refused its key)
+        if (h := hash(state)) in visited or state.moves > open_g.get(h, -1):
             continue
             
         visited.add(h)
+        del open_g[h]
+        if budget.tick(state, entry[1], len(heap)):
+            return None
         for successor in state.get_successors(level):
-            heapq.heappush(heap, (heuristic(successor.grid, successor.blocks) + successor.moves, successor))
+            if _improves_open(successor, visited, open_g):
+                h_value = heuristic(successor)
+                heapq.heappush(heap, (h_value + successor.moves, h_value, tie(successor.moves),
+                                      next(counter), successor))
+
+    return None
+
+def ida_star(initial_state, heuristic, level, tt_size=100000, budget=None):
+    """
+    Iterative-Deepening A* with an optional bounded transposition table.
+    
+    Args:
+        initial_state (State): Starting puzzle configuration
+        heuristic (function): Admissible heuristic function (never overestimates)
+        level (int): Current game level
+        tt_size (int): Max transposition table entries (0 disables it)
+        budget (Budget): Search limits and progress reporting
+        
+    Returns:
+        State: Solved state if found within budget, None otherwise
+        
+    Notes:
+        - Repeated depth-first searches bounded by f(n) = g(n) + h(n); each
+          iteration raises the bound to the smallest f that exceeded it
+        - Finds optimal solutions when heuristic is admissible (e.g.
+          pattern_database.PatternDatabase); heuristic_filled_cells is not,
+          since one line clear removes several cells in a single move
+        - Memory is linear in solution depth (the DFS stack and the states on
+          the current path) plus at most tt_size table entries
+        - The table remembers the smallest g each state was searched with in
+          the current iteration and prunes revisits that can't do better
+    """
+    budget = (budget or Budget()).start()
+    if initial_state.is_goal():
+        return initial_state
+    bound = heuristic(initial_state) + initial_state.moves
 
-    return None
\ No newline at end of file
+    while True:
+        next_bound = None
+        table = {}
+        on_path = {hash(initial_state)}
+        stack = [(initial_state, initial_state.expand(level))]
+
+        while stack:
+            state, moves = stack[-1]
+            move = next(moves, None)
+            if move is None:
+                stack.pop()  # All children explored - backtrack
+                on_path.discard(hash(state))
+                continue
+                
+            successor = state.apply(move, level)
+            if (h := hash(successor)) in on_path:
+                continue  # Cycle back to a state on the current path
+                
+            f = successor.moves + heuristic(successor)
+            if f > bound:
+                if next_bound is None or f < next_bound:
+                    next_bound = f
+                continue
+                
+            if successor.is_goal():
+                return successor
+                
+            if table.get(h, successor.moves + 1) <= successor.moves:
+                continue  # Already searched with at least this much budget
+            if len(table) < tt_size:
+                table[h] = successor.moves
+                
+            on_path.add(h)
+            stack.append((successor, successor.expand(level)))
+            if budget.tick(successor, f - successor.moves, len(stack)):
+                return None
+
+        if next_bound is None:
+            return None  # Whole space explored without reaching the goal
+        bound = next_bound
+
+def beam_search(initial_state, heuristic, level, width=50, budget=None, memory=None):
+    """
+    Beam Search keeping only the best `width` states of each depth.
+    
+    Args:
+        initial_state (State): Starting puzzle configuration
+        heuristic (function): Function that evaluates state quality (h(n)),
+            any function from heuristics.py
+        level (int): Current game level
+        width (int): Beam width K (states kept per depth)
+        budget (Budget): Search limits and progress reporting
+        memory (SearchMemory): Table carried over from earlier searches of
+            the same game (see hints.SearchMemory), None to search from scratch
+        
+    Returns:
+        State: Solved state if found within budget, None otherwise
+        
+    Notes:
+        - Each layer expands at most K states and keeps the K children with
+          the lowest h, so memory and time per depth are bounded by
+          K * branching factor
+        - Incomplete and not optimal: good children can fall off the beam
+        - Duplicates are removed within a layer and against the states
+          already kept by earlier layers (O(depth * K) keys)
+        - With a memory, children on a known plan finish the search at once,
+          known dead ends never take a beam slot, and states whose children
+          are all dead ends are recorded as dead ends themselves
+    """
+    budget = (budget or Budget()).start()
+    if initial_state.is_goal():
+        return initial_state
+    counter = itertools.count()
+    beam = [(heuristic(initial_state), next(counter), initial_state)]
+    kept = {hash(initial_state)}
+
+    while beam:
+        candidates = {}
+        for h_value, _, state in beam:
+            if budget.tick(state, h_value, len(beam)):
+                return None
+            alive = False
+            for move in state.expand(level):
+                successor = state.apply(move, level)
+                if successor.is_goal():
+                    return successor
+                if memory is not None:
+                    if (goal := memory.finish(successor)) is not None:
+                        return goal
+                    if memory.is_dead(successor):
+                        continue
+                alive = True
+                if (h := hash(successor)) not in kept and h not in candidates:
+                    candidates[h] = successor
+            if memory is not None and not alive:
+                memory.mark_dead(state)
+                    
+        beam = heapq.nsmallest(width, ((heuristic(s), next(counter), s) for s in candidates.values()))
+        kept.update(hash(entry[-1]) for entry in beam)
+
+    return None
@@ -0,0 +1,282 @@
+"""
+Persistent solution cache for Wood Block Puzzle solver.
+
+This module contains SolutionCache, a small sqlite store mapping a canonical
+position to the best plan known for it, so pc_mode and hints can skip the
+search for positions already solved in an earlier run.
+
+Positions are keyed by (level, color-agnostic Zobrist key) and the
+occupancy is stored alongside to reject key collisions. Every row records
+the solver that found its plan and whether the plan is proven shortest, so
+callers needing an optimal plan never get a heuristic one. Plans are stored as
+(shape, placement) codes that don't depend on the inventory order or block
+colors, and are replayed from the caller's state, so colors follow the
+actual blocks. The store is stamped with a digest of LEVEL_BLOCKS and
+emptied when the block sets change.
+
+The same file keeps the record of portfolio races (which member won each
+run), so the statistics survive between sessions.
+"""
+
+import hashlib
+import json
+import sqlite3
+import time
+from cst import *
+from game import *
+
+SCHEMA_VERSION = 2
+
+
+def _signed(key):
+    """Map an unsigned 64-bit key to sqlite's signed INTEGER range."""
+    return key - (1 << 64) if key >= 1 << 63 else key
+
+
+def blocks_version():
+    """
+    Digest of the block sets plans depend on (refills come from LEVEL_BLOCKS).
+
+    Returns:
+        str: Version stamp stored with the cache
+    """
+    digest = hashlib.sha1(repr(sorted(LEVEL_BLOCKS.items())).encode()).hexdigest()[:16]
+    return f"{SCHEMA_VERSION}:{digest}"
+
+
+def _shape_index(block, level):
+    """Index of the first LEVEL_BLOCKS[level] entry with this block's shape."""
+    shape = block_key(block)
+    for index, (candidate, _) in enumerate(LEVEL_BLOCKS[level]):
+        if block_key(candidate) == shape:
+            return index
+    raise ValueError("block is not part of this level")
+
+
+def encode_plan(path, level):
+    """
+    Encode the moves of a path independently of inventory order and colors.
+
+    Args:
+        path (list[State]): States from the start position to the goal
+        level (int): Current game level
+
+    Returns:
+        list[list]: [shape index, placement index] per move
+    """
+    codes = []
+    for parent, child in zip(path, path[1:]):
+        i, rotation, x, y, mask = child.move
+        block = parent.blocks[i][0]
+        codes.append([_shape_index(block, level),
+                      get_placements(block, parent.grid_size).index((rotation, x, y, mask))])
+    return codes
+
+
+def replay_plan(state, codes, level):
+    """
+    Re-apply encoded moves from a state.
+
+    Args:
+        state (State): Start position
+        codes (list[list]): Output of encode_plan()
+        level (int): Current game level
+
+    Returns:
+        State: Final state (parent chain back to `state`), None if a move
+        doesn't apply (the stored plan doesn't match this position)
+    """
+    for shape_index, placement in codes:
+        shape = block_key(LEVEL_BLOCKS[level][shape_index][0])
+        for i, (block, _) in enumerate(state.blocks):
+            if block_key(block) == shape:
+                break
+        else:
+            return None
+        placements = get_placements(block, state.grid_size)
+        if placement >= len(placements) or state.occupancy & placements[placement][3]:
+            return None
+        state = state.apply((i, *placements[placement]), level)
+    return state
+
+
+class SolutionCache:
+    """
+    Size-bounded, persistent map from positions to their best known plan.
+
+    Every position along a stored solution is recorded with its remaining
+    plan, so later positions of the same game hit too. Rows are evicted
+    least recently used first once `max_entries` is exceeded. sqlite errors
+    (locked or unreadable file) are treated as cache misses: the cache never
+    stops a search from running.
+
+    Attributes:
+        path (str): Database file
+        max_entries (int): Maximum number of stored positions
+        hits (int): Successful lookups
+        misses (int): Failed lookups
+    """
+
+    def __init__(self, path=SOLUTION_CACHE_PATH, max_entries=SOLUTION_CACHE_SIZE):
+        """
+        Open (or create) the store, clearing it if LEVEL_BLOCKS changed.
+
+        Falls back to an in-memory store if the file can't be used.
+
+        Args:
+            path (str): Database file (":memory:" for a throwaway cache)
+            max_entries (int): Maximum number of stored positions
+        """
+        self.path = path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        try:
+            self._db = sqlite3.connect(path, timeout=1)
+            self._create()
+        except sqlite3.Error:
+            self._db = sqlite3.connect(":memory:")  # Unusable file: cache for this run only
+            self._create()
+
+    def _create(self):
+        """Create the tables, dropping plans stored for other block sets or schemas."""
+        with self._db:
+            self._db.execute("CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT)")
+            row = self._db.execute("SELECT value FROM meta WHERE name = 'version'").fetchone()
+            if row is None or row[0] != blocks_version():
+                self._db.execute("DROP TABLE IF EXISTS plans")
+                self._db.execute("INSERT OR REPLACE INTO meta VALUES ('version', ?)",
+                                 (blocks_version(),))
+            self._db.execute("""CREATE TABLE IF NOT EXISTS plans (
+                level INTEGER, key INTEGER, occupancy TEXT, cost INTEGER, algorithm TEXT,
+                optimal INTEGER, plan TEXT, used REAL, PRIMARY KEY (level, key))""")
+            self._db.execute("CREATE INDEX IF NOT EXISTS plans_used ON plans (used)")
+            self._db.execute("""CREATE TABLE IF NOT EXISTS portfolio_runs (
+                level INTEGER, optimality TEXT, winner TEXT, moves INTEGER,
+                elapsed REAL, recorded REAL)""")
+
+    @staticmethod
+    def _key(state):
+        """Color-agnostic key of a state (its own key if already agnostic)."""
+        if state.color_agnostic:
+            return state.key
+        return board_key(dict.fromkeys(iter_bits(state.occupancy)), True) ^ \
+            inventory_key(state.blocks, True)
+
+    def lookup(self, state, level, optimal=False, algorithm=None):
+        """
+        Find the best known plan from a position.
+
+        Args:
+            state (State): Position to solve
+            level (int): Current game level
+            optimal (bool): Only accept a proven shortest plan
+            algorithm (str): Only accept a plan found by this solver
+
+        Returns:
+            tuple: (goal State with a parent chain back to `state`, algorithm
+            name), or None on a miss (including a plan that doesn't meet the
+            requirements)
+        """
+        try:
+            row = self._db.execute(
+                "SELECT occupancy, algorithm, plan, optimal FROM plans WHERE level = ? AND key = ?",
+                (level, _signed(self._key(state)))).fetchone()
+            if row is None or row[0] != format(state.occupancy, "x") or \
+                    (optimal and not row[3]) or (algorithm and row[1] != algorithm):
+                self.misses += 1
+                return None
+            goal = replay_plan(state, json.loads(row[2]), level)
+            if goal is None or not goal.is_goal():
+                self.misses += 1
+                return None
+            with self._db:
+                self._db.execute("UPDATE plans SET used = ? WHERE level = ? AND key = ?",
+                                 (time.time(), level, _signed(self._key(state))))
+        except sqlite3.Error:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return goal, row[1]
+
+    def store(self, solution, level, algorithm, optimal=False):
+        """
+        Record a solution for every position along it (keeping cheaper plans).
+
+        Args:
+            solution (State): Goal state with a parent chain to the start
+            level (int): Current game level
+            algorithm (str): Name of the solver that found it
+            optimal (bool): The plan is proven shortest (so is every suffix)
+
+        Notes:
+            - A stored plan is replaced by a cheaper one, or by an optimal
+              one of the same cost
+        """
+        path = solution.path()
+        codes = encode_plan(path, level)
+        now = time.time()
+        rows = [(level, _signed(self._key(state)), format(state.occupancy, "x"), len(codes) - depth,
+                 algorithm, int(optimal), json.dumps(codes[depth:]), now)
+                for depth, state in enumerate(path[:-1])]
+        try:
+            with self._db:
+                self._db.executemany("""INSERT INTO plans VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                    ON CONFLICT (level, key) DO UPDATE SET
+                        occupancy = excluded.occupancy, cost = excluded.cost,
+                        algorithm = excluded.algorithm, optimal = excluded.optimal,
+                        plan = excluded.plan, used = excluded.used
+                    WHERE excluded.cost < plans.cost OR excluded.occupancy != plans.occupancy
+                        OR (excluded.cost = plans.cost AND excluded.optimal > plans.optimal)""", rows)
+                excess = self._db.execute("SELECT COUNT(*) FROM plans").fetchone()[0] - self.max_entries
+                if excess > 0:
+                    self._db.execute("""DELETE FROM plans WHERE rowid IN
+                        (SELECT rowid FROM plans ORDER BY used LIMIT ?)""", (excess,))
+        except sqlite3.Error:
+            pass  # A read-only or locked store just doesn't learn this plan
+
+    def record_win(self, level, optimality, winner, moves, elapsed):
+        """
+        Record the member that won a portfolio run.
+
+        Args:
+            level (int): Game level
+            optimality (str): OPTIMALITY key the portfolio ran with
+            winner (str): PORTFOLIO name whose plan was returned
+            moves (int): Length of that plan
+            elapsed (float): Seconds the race took
+        """
+        try:
+            with self._db:
+                self._db.execute("INSERT INTO portfolio_runs VALUES (?, ?, ?, ?, ?, ?)",
+                                 (level, optimality, winner, moves, elapsed, time.time()))
+        except sqlite3.Error:
+            pass
+
+    def portfolio_wins(self, level, optimality=None):
+        """
+        How often each member won the portfolio on a level.
+
+        Args:
+            level (int): Game level
+            optimality (str): Only count runs with this OPTIMALITY key
+                (default: all runs)
+
+        Returns:
+            dict: PORTFOLIO name -> wins, most frequent winner first
+        """
+        try:
+            rows = self._db.execute("""SELECT winner, COUNT(*) AS wins FROM portfolio_runs
+                WHERE level = ? AND (? IS NULL OR optimality = ?)
+                GROUP BY winner ORDER BY wins DESC, winner""",
+                                    (level, optimality, optimality)).fetchall()
+        except sqlite3.Error:
+            return {}
+        return dict(rows)
+
+    def __len__(self):
+        return self._db.execute("SELECT COUNT(*) FROM plans").fetchone()[0]
+
+    def close(self):
+        """Close the database."""
+        self._db.close()
@@ -0,0 +1,445 @@
+"""
+Endgame tablebase for Wood Block Puzzle solver.
+
+This module contains an offline generator that computes, by retrograde
+analysis from the empty board, the exact number of moves to the goal of
+every (occupancy, inventory) pair of a board size under one level's
+LEVEL_BLOCKS, and a memory-mapped reader that answers solvers and hints
+with table lookups instead of search.
+
+Inventories are sets of LEVEL_BLOCKS[level] entries (move order inside an
+inventory doesn't change distances), so a position is the index
+`occupancy << blocks | inventory bits` into a byte array:
+
+    header (TABLE_HEADER)   magic, format, grid size, block count, digest
+    distances (1 byte each) moves to the goal, UNSOLVABLE if none
+
+A dense table has 2 ** (cells + blocks) entries: 1 MiB for a 4x4 board
+with 4 blocks, but 512 MiB for 5x5, so only boards up to
+TABLEBASE_MAX_CELLS cells are generated densely. Larger boards get a sparse
+table of the positions reachable from the level's starting board
+(LEVEL_CONFIG), sorted by index and found by binary search:
+
+    header (TABLE_HEADER)   same fields, format SPARSE_FORMAT
+    records (SPARSE_RECORD) position index (8), distance (1)
+
+Sparse tables take 9 bytes per reachable position on disk and roughly
+100 bytes of RAM while building, so generation stops beyond
+TABLEBASE_MAX_POSITIONS (level 2 already reaches 22 million positions within
+9 moves, level 3 almost 6 million within 8).
+
+Usage:
+    python tablebase.py LEVEL SIZE [MAX_CELLS]
+"""
+
+import hashlib
+import mmap
+import os
+import struct
+import sys
+from array import array
+from bisect import bisect_left
+from collections import deque
+from cst import *
+from game import *
+
+TABLE_HEADER = struct.Struct(">4sBBB16s")
+TABLE_MAGIC = b"WBTB"
+TABLE_FORMAT = 1
+SPARSE_FORMAT = 2
+SPARSE_RECORD = struct.Struct(">QB")
+UNSOLVABLE = 0xFF
+MAX_EDGE_BLOCKS = 8   # Block index of a packed edge (occupancy << 3 | block)
+MAX_EDGE_CELLS = 29   # Occupancy bits of a packed edge in an array("I")
+_TABLES = {}  # (level, grid_size) -> Tablebase, or None if unavailable
+
+
+def level_digest(level):
+    """
+    Digest of a level's block set, stored in the header to detect stale files.
+
+    Returns:
+        bytes: 16 ASCII hex characters
+    """
+    return hashlib.sha1(repr(LEVEL_BLOCKS[level]).encode()).hexdigest()[:16].encode()
+
+
+def tablebase_path(level, grid_size, directory=TABLEBASE_DIR):
+    """File name of the table of a level and board size."""
+    return os.path.join(directory, f"level{level}_{grid_size}x{grid_size}.tb")
+
+
+def _inventory_bits(blocks, level):
+    """
+    Inventory as a bitmask of LEVEL_BLOCKS[level] indices.
+
+    Returns:
+        int: Bitmask, None if a block is foreign or repeated
+    """
+    shapes = [block_key(block) for block, _ in LEVEL_BLOCKS[level]]
+    bits = 0
+    for block, _ in blocks:
+        shape = block_key(block)
+        if shape not in shapes or bits & (1 << shapes.index(shape)):
+            return None
+        bits |= 1 << shapes.index(shape)
+    return bits
+
+
+def build_tablebase(level, grid_size, path=None, max_cells=TABLEBASE_MAX_CELLS):
+    """
+    Generate the distance table of a level and board size (offline).
+
+    Args:
+        level (int): Game level (selects LEVEL_BLOCKS)
+        grid_size (int): Board size N (N x N)
+        path (str): Output file (default: tablebase_path())
+        max_cells (int): Refuse boards with more cells (table size grows as
+            2 ** cells)
+
+    Returns:
+        str: Path of the written table
+
+    Notes:
+        - One forward pass lists, for every occupancy, the (occupancy,
+          block) pairs that lead to it (placement + line clears)
+        - retrograde_distances() then assigns every position the distance of
+          the first backward BFS layer reaching it
+    """
+    cells = grid_size * grid_size
+    if cells > min(max_cells, MAX_EDGE_CELLS):
+        raise ValueError(f"{grid_size}x{grid_size} board exceeds "
+                         f"{min(max_cells, MAX_EDGE_CELLS)} cells")
+    blocks = LEVEL_BLOCKS[level]
+    k = len(blocks)
+    if k > MAX_EDGE_BLOCKS:
+        raise ValueError(f"level {level} has more than {MAX_EDGE_BLOCKS} blocks")
+    masks = [[mask for _, _, _, mask in get_placements(block, grid_size)] for block, _ in blocks]
+
+    # Forward pass: reverse edges, stored as source occupancy << 3 | block
+    predecessors = [array("I") for _ in range(1 << cells)]
+    for occupancy in range(1 << cells):
+        for b, block_masks in enumerate(masks):
+            for mask in block_masks:
+                if not occupancy & mask:
+                    after, _, _ = clear_completed_lines_mask(occupancy | mask, grid_size)
+                    predecessors[after].append(occupancy << 3 | b)
+
+    path = path or tablebase_path(level, grid_size)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "wb") as out:
+        out.write(TABLE_HEADER.pack(TABLE_MAGIC, TABLE_FORMAT, grid_size, k, level_digest(level)))
+        out.write(retrograde_distances(predecessors, k))
+    return path
+
+
+def retrograde_distances(predecessors, blocks):
+    """
+    Backward BFS from the goals (empty board, any inventory).
+
+    Args:
+        predecessors (list[array]): For every occupancy, the edges reaching
+            it as source occupancy << 3 | block index
+        blocks (int): Number of blocks of the level (inventory bits)
+
+    Returns:
+        bytearray: Moves to the goal of every occupancy << blocks | inventory
+        index, UNSOLVABLE for positions never reached
+
+    Raises:
+        ValueError: If edges can't be packed (more than MAX_EDGE_BLOCKS
+            blocks or MAX_EDGE_CELLS cells)
+
+    Notes:
+        - Predecessor inventories: placing block b turns I into I - {b}, or
+          into the full set when b was the last block
+    """
+    if blocks > MAX_EDGE_BLOCKS or len(predecessors) > 1 << MAX_EDGE_CELLS:
+        raise ValueError("edges are packed as occupancy << 3 | block: at most "
+                         f"{MAX_EDGE_BLOCKS} blocks and {MAX_EDGE_CELLS} cells")
+    full = (1 << blocks) - 1
+    distances = bytearray([UNSOLVABLE]) * (len(predecessors) << blocks)
+    queue = deque()
+    for inventory in range(1, full + 1):
+        distances[inventory] = 0
+        queue.append(inventory)
+    while queue:
+        index = queue.popleft()
+        distance = min(distances[index] + 1, UNSOLVABLE - 1)
+        after, inventory = index >> blocks, index & full
+        for edge in predecessors[after]:
+            bit = 1 << (edge & 7)
+            if inventory == full:
+                before = bit  # b was the last block: the inventory was refilled
+            elif inventory & bit:
+                continue  # b can't still be in the inventory after placing it
+            else:
+                before = inventory | bit
+            before |= edge >> 3 << blocks
+            if distances[before] == UNSOLVABLE:
+                distances[before] = distance
+                queue.append(before)
+    return distances
+
+
+def level_start(level, grid_size):
+    """
+    Occupancy of a level's starting board.
+
+    Raises:
+        ValueError: If LEVEL_CONFIG has no such level on this board size
+    """
+    config = LEVEL_CONFIG.get(level)
+    if config is None or config["size"] != grid_size:
+        raise ValueError(f"level {level} has no {grid_size}x{grid_size} starting board")
+    return sum(1 << y * grid_size + x for y, row in enumerate(config["grid"])
+               for x, cell in enumerate(row) if cell)
+
+
+def _successors(position, blocks, masks, grid_size):
+    """
+    Positions one move away (position = occupancy << blocks | inventory bits).
+
+    Yields:
+        int: Child position; placing the last block refills the inventory
+    """
+    full = (1 << blocks) - 1
+    occupancy, inventory = position >> blocks, position & full
+    for b, block_masks in enumerate(masks):
+        if inventory >> b & 1:
+            left = inventory & ~(1 << b) or full
+            for mask in block_masks:
+                if not occupancy & mask:
+                    after, _, _ = clear_completed_lines_mask(occupancy | mask, grid_size)
+                    yield after << blocks | left
+
+
+def build_sparse_tablebase(level, grid_size, path=None, max_positions=TABLEBASE_MAX_POSITIONS):
+    """
+    Generate the sparse table of the positions reachable from a level's start.
+
+    Args:
+        level (int): Game level (selects LEVEL_BLOCKS and LEVEL_CONFIG)
+        grid_size (int): Board size N (N x N)
+        path (str): Output file (default: tablebase_path())
+        max_positions (int): Refuse levels reaching more positions
+
+    Returns:
+        str: Path of the written table
+
+    Raises:
+        ValueError: If the level has no board of this size or reaches more
+            than max_positions positions
+
+    Notes:
+        - A forward BFS from the start collects the reachable positions
+          (every successor of one is reachable, so distances are exact)
+        - Distances are assigned one layer per pass over the sorted
+          positions: a position is at distance d once a child is at d - 1
+        - Positions that can't reach the goal are stored as UNSOLVABLE, so
+          the table tells them apart from positions it doesn't cover
+    """
+    k = len(LEVEL_BLOCKS[level])
+    masks = [[mask for _, _, _, mask in get_placements(block, grid_size)]
+             for block, _ in LEVEL_BLOCKS[level]]
+    root = level_start(level, grid_size) << k | (1 << k) - 1
+    seen = {root}
+    frontier = [root]
+    while frontier:
+        layer = []
+        for position in frontier:
+            if position >> k:  # Goals (empty board) end the game
+                for child in _successors(position, k, masks, grid_size):
+                    if child not in seen:
+                        seen.add(child)
+                        layer.append(child)
+        if len(seen) > max_positions:
+            raise ValueError(f"level {level} reaches more than {max_positions} positions")
+        frontier = layer
+    positions = array("Q", sorted(seen))
+    del seen, frontier
+
+    distances = bytearray([UNSOLVABLE]) * len(positions)
+    pending = []
+    for i, position in enumerate(positions):
+        if position >> k:
+            pending.append(i)
+        else:
+            distances[i] = 0
+    distance = 0
+    while pending and distance < UNSOLVABLE - 1:
+        distance += 1
+        remaining = []
+        for i in pending:
+            if any(distances[bisect_left(positions, child)] == distance - 1
+                   for child in _successors(positions[i], k, masks, grid_size)):
+                distances[i] = distance
+            else:
+                remaining.append(i)
+        if len(remaining) == len(pending):
+            break  # The rest can't reach the goal
+        pending = remaining
+
+    path = path or tablebase_path(level, grid_size)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "wb") as out:
+        out.write(TABLE_HEADER.pack(TABLE_MAGIC, SPARSE_FORMAT, grid_size, k, level_digest(level)))
+        for start in range(0, len(positions), 65536):
+            out.write(b"".join(SPARSE_RECORD.pack(position, distances[start + j])
+                               for j, position in enumerate(positions[start:start + 65536])))
+    return path
+
+
+class Tablebase:
+    """
+    Read-only, memory-mapped distance table of one level and board size.
+
+    Dense tables cover every position, sparse ones the positions reachable
+    from the level's starting board (see covers()).
+
+    Attributes:
+        level (int): Game level
+        grid_size (int): Board size
+    """
+
+    def __init__(self, path, level, grid_size):
+        """
+        Map a table written by build_tablebase() or build_sparse_tablebase().
+
+        Raises:
+            ValueError: If the file doesn't match this level / board size or
+                was built for different LEVEL_BLOCKS
+        """
+        self.level = level
+        self.grid_size = grid_size
+        self._blocks = len(LEVEL_BLOCKS[level])
+        self._file = open(path, "rb")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.sparse = self._map[4:5] == bytes([SPARSE_FORMAT])
+        expected = TABLE_HEADER.pack(TABLE_MAGIC, SPARSE_FORMAT if self.sparse else TABLE_FORMAT,
+                                     grid_size, self._blocks, level_digest(level))
+        body = len(self._map) - TABLE_HEADER.size
+        self._count = body // SPARSE_RECORD.size
+        valid = (not body % SPARSE_RECORD.size if self.sparse
+                 else body == 1 << (grid_size * grid_size + self._blocks))
+        if self._map[:TABLE_HEADER.size] != expected or not valid:
+            self.close()
+            raise ValueError(f"{path} is not a current table for level {level}")
+
+    def _entry(self, index):
+        """Stored distance byte of a position index, None if not tabulated."""
+        if not self.sparse:
+            return self._map[TABLE_HEADER.size + index]
+        target = index.to_bytes(8, "big")
+        low, high = 0, self._count
+        while low < high:
+            middle = (low + high) // 2
+            offset = TABLE_HEADER.size + middle * SPARSE_RECORD.size
+            if self._map[offset:offset + 8] < target:
+                low = middle + 1
+            else:
+                high = middle
+        offset = TABLE_HEADER.size + low * SPARSE_RECORD.size
+        if low < self._count and self._map[offset:offset + 8] == target:
+            return self._map[offset + 8]
+        return None
+
+    def covers(self, state):
+        """
+        Whether the table knows a state (solvable or not).
+
+        Returns:
+            bool: False for foreign inventories and, in sparse tables,
+            positions not reachable from the level's starting board
+        """
+        inventory = _inventory_bits(state.blocks, self.level)
+        return inventory is not None and \
+            self._entry(state.occupancy << self._blocks | inventory) is not None
+
+    def distance(self, state):
+        """
+        Exact number of moves from a state to the goal.
+
+        Args:
+            state (State): Position (grid_size must match)
+
+        Returns:
+            int: Moves to the goal, None if unsolvable or not tabulated
+        """
+        inventory = _inventory_bits(state.blocks, self.level)
+        if inventory is None:
+            return None
+        distance = self._entry(state.occupancy << self._blocks | inventory)
+        return None if distance is None or distance == UNSOLVABLE else distance
+
+    def solve(self, state):
+        """
+        Follow the table down to the goal.
+
+        Args:
+            state (State): Start position
+
+        Returns:
+            State: Goal reached by a shortest plan (parent chain back to
+            `state`), None if the position is unsolvable
+        """
+        distance = self.distance(state)
+        if distance is None:
+            return None
+        while distance:
+            for move in state.expand(self.level):
+                child = state.apply(move, self.level)
+                if child.is_goal() or self.distance(child) == distance - 1:
+                    state, distance = child, distance - 1
+                    break
+            else:
+                return None  # Inconsistent table
+        return state
+
+    def close(self):
+        """Release the memory map and file handle."""
+        self._map.close()
+        self._file.close()
+
+
+def load_tablebase(level, grid_size):
+    """
+    Tablebase of a level and board size, opened on first use.
+
+    Returns:
+        Tablebase: The table, None if it wasn't generated (or is stale)
+    """
+    if (level, grid_size) not in _TABLES:
+        try:
+            _TABLES[level, grid_size] = Tablebase(tablebase_path(level, grid_size), level, grid_size)
+        except (OSError, ValueError):
+            _TABLES[level, grid_size] = None
+    return _TABLES[level, grid_size]
+
+
+def tablebase_search(initial_state, level, budget=None):
+    """
+    Solver backed by a tablebase (same interface as the search.py solvers).
+
+    Args:
+        initial_state (State): Starting puzzle configuration
+        level (int): Current game level
+        budget (Budget): Unused (a lookup never runs out of budget)
+
+    Returns:
+        State: Goal reached by a shortest plan, None if there is no table,
+        the table doesn't cover the position or it is unsolvable
+    """
+    table = load_tablebase(level, initial_state.grid_size)
+    return table.solve(initial_state) if table else None
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3:
+        sys.exit(__doc__)
+    level, grid_size = int(sys.argv[1]), int(sys.argv[2])
+    max_cells = int(sys.argv[3]) if len(sys.argv) > 3 else TABLEBASE_MAX_CELLS
+    if grid_size * grid_size <= min(max_cells, MAX_EDGE_CELLS):
+        print(build_tablebase(level, grid_size, max_cells=max_cells))
+    else:
+        print(build_sparse_tablebase(level, grid_size))
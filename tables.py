@@ -0,0 +1,299 @@
+"""
+Compact duplicate-detection tables for Wood Block Puzzle search.
+
+This module contains drop-in replacements for the `visited` sets used by the
+solvers in search.py. They store 64-bit state keys (hash(state)) in flat
+preallocated buffers instead of Python set entries:
+- VisitedTable: exact open-addressing hash set with a fixed byte budget
+- BloomFilter: approximate set with a fixed byte budget (may report false
+  positives, never false negatives)
+"""
+
+import math
+import mmap
+from array import array
+
+EMPTY = 0       # Slot marker; key 0 is stored as ZERO_KEY instead
+ZERO_KEY = 1
+MIX = 0x9E3779B97F4A7C15  # 64-bit golden-ratio multiplier spreading key bits
+MAX_HASHES = 16           # Cap on Bloom filter k (each hash costs a probe)
+
+
+class VisitedTable:
+    """
+    Open-addressing (linear probing) set of state keys in a fixed byte budget.
+
+    Uses 8 bytes per slot, against roughly 50-70 bytes per entry for a
+    Python set of ints. Supports the subset of the set API the solvers use
+    (`in`, `add`, `len`).
+
+    Attributes:
+        capacity (int): Number of slots (largest power of two in the budget)
+        max_load (float): Fill ratio above which new keys are refused
+        lookups (int): Membership tests and insertions performed
+        probes (int): Slots inspected by those operations
+        max_probe (int): Longest probe sequence seen
+        overflow (int): Keys refused because the table was full
+
+    Note:
+        A full table keeps answering lookups but stops recording new keys, so
+        a search may re-expand some states instead of crashing; watch
+        `overflow` (or stats()) to size the budget.
+    """
+
+    def __init__(self, budget_bytes=64 * 1024 * 1024, max_load=0.9, path=None):
+        """
+        Allocate the table.
+
+        Args:
+            budget_bytes (int): Memory for the slots (default 64 MiB)
+            max_load (float): Max fill ratio before refusing inserts (below
+                1.0, so probing always reaches an empty slot)
+            path (str): Back the table with this memory-mapped file instead
+                of an in-process array (None = array)
+
+        Raises:
+            ValueError: If max_load is not in [0, 1)
+        """
+        if not 0 <= max_load < 1:
+            raise ValueError("max_load must be in [0, 1)")
+        capacity = 1
+        while capacity * 2 * 8 <= budget_bytes:
+            capacity *= 2
+        self.capacity = capacity
+        self.max_load = max_load
+        self._mask = capacity - 1
+        self._limit = int(capacity * max_load)
+        self._size = 0
+        self._file = None
+        self._map = None
+        if path is None:
+            self._slots = array("Q", bytes(capacity * 8))
+        else:
+            self._file = open(path, "w+b")
+            self._file.truncate(capacity * 8)
+            self._map = mmap.mmap(self._file.fileno(), capacity * 8)
+            self._slots = memoryview(self._map).cast("Q")
+        self.lookups = 0
+        self.probes = 0
+        self.max_probe = 0
+        self.overflow = 0
+
+    def _find(self, key):
+        """
+        Probe for a key.
+
+        Args:
+            key (int): Normalized key
+
+        Returns:
+            tuple: (slot index, True if the key is stored there)
+        """
+        slots = self._slots
+        index = key & self._mask
+        probes = 1
+        while True:
+            current = slots[index]
+            if current == key or current == EMPTY:
+                break
+            index = (index + 1) & self._mask
+            probes += 1
+        self.lookups += 1
+        self.probes += probes
+        if probes > self.max_probe:
+            self.max_probe = probes
+        return index, current == key
+
+    @staticmethod
+    def _normalize(key):
+        """Map any hash to a non-zero unsigned 64-bit slot value."""
+        key &= 0xFFFFFFFFFFFFFFFF
+        return key or ZERO_KEY
+
+    def __contains__(self, key):
+        return self._find(self._normalize(key))[1]
+
+    def add(self, key):
+        """
+        Record a key.
+
+        Args:
+            key (int): State hash
+
+        Returns:
+            bool: True if the key is stored (new or already present), False
+            if the table is full and the key was refused
+        """
+        key = self._normalize(key)
+        index, found = self._find(key)
+        if found:
+            return True
+        if self._size >= self._limit:
+            self.overflow += 1
+            return False
+        self._slots[index] = key
+        self._size += 1
+        return True
+
+    def update(self, keys):
+        """Record every key of an iterable."""
+        for key in keys:
+            self.add(key)
+
+    def __len__(self):
+        return self._size
+
+    @property
+    def load_factor(self):
+        """Fraction of slots in use."""
+        return self._size / self.capacity
+
+    def stats(self):
+        """
+        Occupancy and probing statistics.
+
+        Returns:
+            dict: size, capacity, bytes, load_factor, avg_probe, max_probe,
+            overflow
+        """
+        return {
+            "size": self._size,
+            "capacity": self.capacity,
+            "bytes": self.capacity * 8,
+            "load_factor": self.load_factor,
+            "avg_probe": self.probes / self.lookups if self.lookups else 0.0,
+            "max_probe": self.max_probe,
+            "overflow": self.overflow,
+        }
+
+    def close(self):
+        """Release a memory-mapped backing file (no-op for arrays)."""
+        if self._map is not None:
+            self._slots.release()
+            self._map.close()
+            self._file.close()
+            self._map = None
+
+
+class BloomFilter:
+    """
+    Bloom filter of state keys in a fixed byte budget.
+
+    Each key sets `hashes` bits chosen by double hashing of the (mixed) key.
+    A lookup can wrongly answer "seen" (false positive) but never misses a
+    key that was added, so a search using it may prune unvisited states:
+    it trades completeness and optimality for a much smaller footprint
+    (about 10 bits per state at a 1% false-positive rate).
+
+    Attributes:
+        bits (int): Filter size in bits (power of two)
+        hashes (int): Bits set per key (k)
+        added (int): Keys inserted that weren't already reported present
+        lookups (int): Membership tests performed
+        hits (int): Membership tests answered "seen" (true duplicates plus
+            false positives)
+    """
+
+    def __init__(self, budget_bytes=8 * 1024 * 1024, expected=None, hashes=None):
+        """
+        Allocate the filter.
+
+        Args:
+            budget_bytes (int): Memory for the bit array (default 8 MiB)
+            expected (int): Expected number of keys, used to pick the optimal
+                number of hashes (default: 10 bits per key)
+            hashes (int): Force the number of hashes k (default: optimal for
+                `expected`, at most MAX_HASHES)
+        """
+        bits = 8
+        while bits * 2 <= budget_bytes * 8:
+            bits *= 2
+        self.bits = bits
+        if hashes is None:
+            expected = expected or bits // 10
+            hashes = min(MAX_HASHES, max(1, round(bits / expected * math.log(2))))
+        self.hashes = hashes
+        self._mask = bits - 1
+        self._array = bytearray(bits // 8)
+        self._set_bits = 0
+        self.added = 0
+        self.lookups = 0
+        self.hits = 0
+
+    def _positions(self, key):
+        """Yield the bit positions of a key."""
+        mixed = (key * MIX) & 0xFFFFFFFFFFFFFFFF
+        step = (mixed >> 32) | 1
+        for i in range(self.hashes):
+            yield (mixed + i * step) & self._mask
+
+    def __contains__(self, key):
+        self.lookups += 1
+        array = self._array
+        for bit in self._positions(key):
+            if not array[bit >> 3] & (1 << (bit & 7)):
+                return False
+        self.hits += 1
+        return True
+
+    def add(self, key):
+        """
+        Record a key.
+
+        Args:
+            key (int): State hash
+
+        Returns:
+            bool: True if at least one bit was new (the key was certainly
+            unseen), False if it may have been added before
+        """
+        array = self._array
+        new = False
+        for bit in self._positions(key):
+            byte, flag = bit >> 3, 1 << (bit & 7)
+            if not array[byte] & flag:
+                array[byte] |= flag
+                self._set_bits += 1
+                new = True
+        if new:
+            self.added += 1
+        return new
+
+    def update(self, keys):
+        """Record every key of an iterable."""
+        for key in keys:
+            self.add(key)
+
+    def __len__(self):
+        return self.added
+
+    def false_positive_rate(self):
+        """
+        Current probability that an unseen key is reported as seen.
+
+        Returns:
+            float: (fraction of bits set) ** hashes
+        """
+        return (self._set_bits / self.bits) ** self.hashes
+
+    def stats(self):
+        """
+        Fill and accuracy statistics.
+
+        Returns:
+            dict: size, bits, bytes, hashes, fill, false_positive_rate,
+            lookups, hits
+        """
+        return {
+            "size": self.added,
+            "bits": self.bits,
+            "bytes": self.bits // 8,
+            "hashes": self.hashes,
+            "fill": self._set_bits / self.bits,
+            "false_positive_rate": self.false_positive_rate(),
+            "lookups": self.lookups,
+            "hits": self.hits,
+        }
+
+    def close(self):
+        """No-op, for symmetry with VisitedTable."""
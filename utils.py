@@ -82,16 +82,14 @@ def no_valid_moves_left(grid, blocks, GRID_SIZE):
     Returns:
         True if no valid moves remain
     """
-    if all(cell != BLACK for row in grid for cell in row):
+    occupancy = grid_to_mask(grid, GRID_SIZE)
+    if occupancy == (1 << GRID_SIZE * GRID_SIZE) - 1:
         return True
         
     for block, _ in blocks:
-        for rotation in get_rotations(block):
-            h, w = len(rotation), len(rotation[0])
-            for y in range(GRID_SIZE - h + 1):
-                for x in range(GRID_SIZE - w + 1):
-                    if can_place_block(rotation, x, y, grid, GRID_SIZE):
-                        return False
+        for _, _, _, mask in get_placements(block, GRID_SIZE):
+            if not occupancy & mask:
+                return False
     return True
 
 def clear_completed_lines(grid, GRID_SIZE):
@@ -113,6 +111,293 @@ def clear_completed_lines(grid, GRID_SIZE):
     
     return len(rows) + len(cols)
 
+def cell_bit(x, y, GRID_SIZE):
+    """Return the occupancy bit for grid cell (x,y).
+    
+    Cells are numbered row-major, so cell (x,y) maps to bit ``y*GRID_SIZE + x``.
+    A 10x10 board therefore fits in a 100-bit Python int.
+    
+    Args:
+        x, y: Grid coordinates
+        GRID_SIZE: Grid dimensions
+        
+    Returns:
+        Int with only that cell's bit set
+    """
+    return 1 << (y * GRID_SIZE + x)
+
+def iter_bits(mask):
+    """Yield the index of every set bit in mask, lowest first.
+    
+    Args:
+        mask: Occupancy bitmask
+        
+    Yields:
+        Cell indices (``y*GRID_SIZE + x``)
+    """
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+def popcount(mask):
+    """Count the filled cells of an occupancy bitmask.
+    
+    Args:
+        mask: Occupancy bitmask
+        
+    Returns:
+        Number of set bits
+    """
+    return mask.bit_count()
+
+def grid_to_mask(grid, GRID_SIZE):
+    """Encode the filled cells of a color grid as an occupancy bitmask.
+    
+    Args:
+        grid: 2D array of RGB tuples (BLACK = empty)
+        GRID_SIZE: Grid dimensions
+        
+    Returns:
+        Int with bit ``y*GRID_SIZE + x`` set for every non-BLACK cell
+    """
+    mask = 0
+    for y in range(GRID_SIZE):
+        for x in range(GRID_SIZE):
+            if grid[y][x] != BLACK:
+                mask |= cell_bit(x, y, GRID_SIZE)
+    return mask
+
+def colors_to_grid(colors, GRID_SIZE):
+    """Rebuild a renderable color grid from a {cell index: color} map.
+    
+    Args:
+        colors: Dict mapping filled cell indices to RGB tuples
+        GRID_SIZE: Grid dimensions
+        
+    Returns:
+        2D array of RGB tuples, BLACK where no color is recorded
+    """
+    grid = [[BLACK] * GRID_SIZE for _ in range(GRID_SIZE)]
+    for index, color in colors.items():
+        grid[index // GRID_SIZE][index % GRID_SIZE] = color
+    return grid
+
+def block_to_mask(block, x, y, GRID_SIZE):
+    """Encode a block anchored at (x,y) as an occupancy bitmask.
+    
+    Args:
+        block: 2D block matrix (1=filled, 0=empty)
+        x, y: Top-left grid coordinates for placement
+        GRID_SIZE: Grid dimensions
+        
+    Returns:
+        Bitmask of the cells the block covers, or None if out-of-bounds
+    """
+    h, w = len(block), len(block[0])
+    if x < 0 or y < 0 or x + w > GRID_SIZE or y + h > GRID_SIZE:
+        return None
+    mask = 0
+    for dy, row in enumerate(block):
+        for dx, cell in enumerate(row):
+            if cell:
+                mask |= cell_bit(x + dx, y + dy, GRID_SIZE)
+    return mask
+
+_LINE_MASKS = {}
+
+def line_masks(GRID_SIZE):
+    """Return the bitmasks of every row and column (cached per grid size).
+    
+    Args:
+        GRID_SIZE: Grid dimensions
+        
+    Returns:
+        Tuple of GRID_SIZE row masks followed by GRID_SIZE column masks
+    """
+    if GRID_SIZE not in _LINE_MASKS:
+        row = (1 << GRID_SIZE) - 1
+        col = sum(1 << (y * GRID_SIZE) for y in range(GRID_SIZE))
+        _LINE_MASKS[GRID_SIZE] = (
+            tuple(row << (y * GRID_SIZE) for y in range(GRID_SIZE)) +
+            tuple(col << x for x in range(GRID_SIZE))
+        )
+    return _LINE_MASKS[GRID_SIZE]
+
+_LINES_THROUGH = {}
+
+def lines_through(mask, GRID_SIZE):
+    """Return the row and column masks a cell mask intersects (cached per mask).
+    
+    Args:
+        mask: Cell bitmask (typically a placement from get_placements)
+        GRID_SIZE: Grid dimensions
+        
+    Returns:
+        Tuple of the line_masks entries sharing a cell with mask
+    """
+    key = (mask, GRID_SIZE)
+    if key not in _LINES_THROUGH:
+        _LINES_THROUGH[key] = tuple(line for line in line_masks(GRID_SIZE) if line & mask)
+    return _LINES_THROUGH[key]
+
+def clear_completed_lines_mask(occupancy, GRID_SIZE, placed=None):
+    """Clear fully filled rows/columns of an occupancy bitmask.
+    
+    Rows and columns are detected on the same board, so a cell lying on both
+    a full row and a full column is cleared once, like clear_completed_lines.
+    
+    Args:
+        occupancy: Board bitmask after placement
+        GRID_SIZE: Grid dimensions
+        placed: Mask of the cells just placed, if the board had no full line
+            before them; only the lines through it are then checked
+        
+    Returns:
+        Tuple (new_occupancy, cleared_mask, lines_cleared)
+    """
+    cleared = 0
+    lines = 0
+    for line in (line_masks(GRID_SIZE) if placed is None else lines_through(placed, GRID_SIZE)):
+        if occupancy & line == line:
+            cleared |= line
+            lines += 1
+    return occupancy & ~cleared, cleared, lines
+
+def block_key(block):
+    """Return a hashable key for a block matrix (used to index placements).
+    
+    Args:
+        block: 2D block matrix
+        
+    Returns:
+        Tuple of row tuples
+    """
+    return tuple(tuple(row) for row in block)
+
+_PLACEMENTS = {}
+
+def get_placements(block, GRID_SIZE):
+    """Return every in-bounds placement of a block, compiled once per grid size.
+    
+    Each entry is (rotation, x, y, mask) where mask is the precomputed
+    block_to_mask of that rotation at anchor (x,y). Out-of-bounds anchors are
+    never listed, so checking a placement is a single `occupancy & mask`.
+    
+    Args:
+        block: 2D block matrix
+        GRID_SIZE: Grid dimensions
+        
+    Returns:
+        Tuple of (rotation, x, y, mask) placements, cached per (shape, GRID_SIZE)
+    """
+    key = (block_key(block), GRID_SIZE)
+    if key not in _PLACEMENTS:
+        placements = []
+        for rotation in get_rotations(block):
+            h, w = len(rotation), len(rotation[0])
+            for x in range(GRID_SIZE - w + 1):
+                for y in range(GRID_SIZE - h + 1):
+                    placements.append((rotation, x, y, block_to_mask(rotation, x, y, GRID_SIZE)))
+        _PLACEMENTS[key] = tuple(placements)
+    return _PLACEMENTS[key]
+
+def build_placement_index(level, GRID_SIZE):
+    """Compile the placement tables of every block of a level.
+    
+    Args:
+        level: Game level (selects LEVEL_BLOCKS[level])
+        GRID_SIZE: Grid dimensions
+        
+    Returns:
+        List of placement tuples aligned with LEVEL_BLOCKS[level]
+    """
+    return [get_placements(block, GRID_SIZE) for block, _ in LEVEL_BLOCKS[level]]
+
+# Zobrist hashing: every board/inventory feature gets a fixed random 64-bit
+# value and a state's key is the XOR of its features, so placing, clearing or
+# consuming a block updates the key by XOR-ing only the features that changed.
+_ZOBRIST = {}
+_ZOBRIST_SEED = 0x5EED
+
+def zobrist(feature):
+    """Return the 64-bit random value of a hashable feature (created on first use).
+    
+    The value is drawn from a generator seeded with the feature's repr, so it
+    doesn't depend on the order features are first seen: every process (and
+    every run) computes the same key for the same state.
+    
+    Args:
+        feature: Hashable description, e.g. ("cell", index, color)
+        
+    Returns:
+        Random 64-bit int, deterministic for a given feature
+    """
+    if feature not in _ZOBRIST:
+        _ZOBRIST[feature] = random.Random(f"{_ZOBRIST_SEED}:{feature!r}").getrandbits(64)
+    return _ZOBRIST[feature]
+
+_CELLS_KEYS = {}
+
+def cells_key(mask, color):
+    """Zobrist key of the cells in mask all painted with color (cached).
+    
+    Args:
+        mask: Bitmask of cells (typically a placement mask)
+        color: RGB color of those cells (None for color-agnostic keys)
+        
+    Returns:
+        XOR of the ("cell", index, color) features
+    """
+    if (mask, color) not in _CELLS_KEYS:
+        key = 0
+        for cell_index in iter_bits(mask):
+            key ^= zobrist(("cell", cell_index, color))
+        _CELLS_KEYS[mask, color] = key
+    return _CELLS_KEYS[mask, color]
+
+def board_key(colors, color_agnostic=False):
+    """Zobrist key of a whole board given its {cell index: color} map.
+    
+    Args:
+        colors: Dict mapping filled cell indices to RGB tuples
+        color_agnostic: Key on occupancy only (every color treated as None)
+        
+    Returns:
+        XOR of the ("cell", index, color) features
+    """
+    key = 0
+    for cell_index, color in colors.items():
+        key ^= zobrist(("cell", cell_index, None if color_agnostic else color))
+    return key
+
+def block_zobrist(block, color):
+    """Zobrist value of one inventory block.
+    
+    Args:
+        block: 2D block matrix
+        color: RGB color of the block (None for color-agnostic keys)
+        
+    Returns:
+        Random 64-bit int for the ("block", shape, color) feature
+    """
+    return zobrist(("block", block_key(block), color))
+
+def inventory_key(blocks, color_agnostic=False):
+    """Zobrist key of a block inventory (order-independent).
+    
+    Args:
+        blocks: List of (block, color) tuples
+        color_agnostic: Key on block shapes only (every color treated as None)
+        
+    Returns:
+        XOR of the block features
+    """
+    key = 0
+    for block, color in blocks:
+        key ^= block_zobrist(block, None if color_agnostic else color)
+    return key
+
 def snap_to_grid(x, y, block, grid, GRID_SIZE, snap_range=20):
     """Snap screen coordinates to nearest valid grid position within range.
     
@@ -13,7 +13,7 @@ All menus follow the same architectural pattern for maintainability.
 """
 
 import pygame
-from cst import WIDTH, HEIGHT, MENU_ASSETS
+from cst import WIDTH, HEIGHT, MENU_ASSETS, BEAM_WIDTHS, BEAM_WIDTH
 from visuals.buttons import Button
 
 # Constants for consistent styling
@@ -269,18 +269,43 @@ class LevelMenu(BaseMenu):
             pygame.display.flip()
 
 class AlgorithmMenu(BaseMenu):
-    """Menu for selecting PC algorithm (BFS, DFS, Greedy, A*)."""
+    """Menu for selecting PC algorithm (BFS, DFS, Greedy, A*, IDA*, Beam, parallel A*/BFS,
+    portfolio).
+    
+    Buttons are laid out in two columns, with Back centered below them. The width button cycles the beam
+    width through BEAM_WIDTHS without leaving the menu; the chosen value is
+    read from `beam_width` when "beam" is returned.
+    """
     
     def __init__(self, screen):
         super().__init__(screen, "algorithm")  # Changed to match background key
+        self.beam_width = BEAM_WIDTH
+        left, right = WIDTH//4, 3*WIDTH//4
+        self.width_button = Button(self._width_label(), (right, START_Y + 2*BUTTON_SPACING), "beam_width")
         self.buttons = [
-            Button("BFS", (WIDTH//2, START_Y), "bfs"),
-            Button("DFS", (WIDTH//2, START_Y + BUTTON_SPACING), "dfs"),
-            Button("Greedy", (WIDTH//2, START_Y + 2*BUTTON_SPACING), "greedy"),
-            Button("A*", (WIDTH//2, START_Y + 3*BUTTON_SPACING), "a_star"),
-            Button("Back", (WIDTH//2, START_Y + 4*BUTTON_SPACING), "back")
+            Button("BFS", (left, START_Y), "bfs"),
+            Button("DFS", (left, START_Y + BUTTON_SPACING), "dfs"),
+            Button("Greedy", (left, START_Y + 2*BUTTON_SPACING), "greedy"),
+            Button("A*", (left, START_Y + 3*BUTTON_SPACING), "a_star"),
+            Button("Parallel A*", (left, START_Y + 4*BUTTON_SPACING), "hda_star"),
+            Button("IDA*", (right, START_Y), "ida_star"),
+            Button("Beam", (right, START_Y + BUTTON_SPACING), "beam"),
+            self.width_button,
+            Button("Parallel BFS", (right, START_Y + 3*BUTTON_SPACING), "parallel_bfs"),
+            Button("Portfolio", (right, START_Y + 4*BUTTON_SPACING), "portfolio"),
+            Button("Back", (WIDTH//2, START_Y + 5*BUTTON_SPACING), "back")
         ]
 
+    def _width_label(self):
+        """Text of the beam width button."""
+        return f"Beam Width: {self.beam_width}"
+
+    def _cycle_beam_width(self):
+        """Advance the beam width to the next value of BEAM_WIDTHS."""
+        index = BEAM_WIDTHS.index(self.beam_width) if self.beam_width in BEAM_WIDTHS else -1
+        self.beam_width = BEAM_WIDTHS[(index + 1) % len(BEAM_WIDTHS)]
+        self.width_button.text = self._width_label()
+
     def run(self):
         """Run the algorithm selection loop."""
         while True:
@@ -289,7 +314,9 @@ class AlgorithmMenu(BaseMenu):
             self._draw_title("Select Algorithm")
             
             action = self._handle_events()
-            if action:
+            if action == "beam_width":
+                self._cycle_beam_width()
+            elif action:
                 return action
             
             self._draw_buttons()